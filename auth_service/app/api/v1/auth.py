@@ -2,8 +2,8 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.database import get_db
-from app.schemas.auth import LoginRequest, Token
-from app.services.auth_service import login
+from app.schemas.auth import LoginRequest, RefreshRequest, Token
+from app.services.auth_service import login, refresh
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -15,4 +15,13 @@ async def login_user(data: LoginRequest, db: AsyncSession = Depends(get_db)):
     if not token:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    return Token(access_token=token)
+    return token
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_tokens(data: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    token = await refresh(db, data.refresh_token)
+    if not token:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    return token
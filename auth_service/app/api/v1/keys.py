@@ -0,0 +1,18 @@
+from fastapi import APIRouter, Response
+
+from app.core.config import settings
+from app.core.signing_keys import signing_keys
+
+router = APIRouter(tags=["keys"])
+
+
+@router.get("/.well-known/jwks.json")
+async def get_jwks(response: Response):
+    # Verifiers poll this on their own schedule, intermediaries may cache it
+    # for a fraction of the activation delay
+    response.headers["Cache-Control"] = (
+        f"public, max-age={settings.JWT_KEY_ACTIVATION_DELAY_SECONDS // 10}"
+    )
+    if settings.JWT_ALGORITHM.startswith("HS"):
+        return {"keys": []}
+    return signing_keys.jwks()
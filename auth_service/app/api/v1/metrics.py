@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Response
+
+from app.core.metrics import CONTENT_TYPE, pool_metrics, registry, snapshot
+from app.core.password_hasher import password_hasher
+from app.db.database import engine
+from app.db.pool import pool_stats
+
+router = APIRouter(tags=["metrics"])
+
+
+def collect_service_stats():
+    yield from pool_metrics({"primary": engine}, pool_stats)
+
+    stats = password_hasher.stats
+    yield snapshot(
+        "password_hash_in_flight",
+        "bcrypt calls running or queued for a worker",
+        (),
+        [((), password_hasher.in_flight)],
+    )
+    yield snapshot(
+        "password_hash_workers",
+        "bcrypt worker threads",
+        (),
+        [((), password_hasher.workers)],
+    )
+    yield snapshot(
+        "password_hash_rejected_total",
+        "bcrypt calls rejected because the queue was full",
+        (),
+        [((), stats["rejected"])],
+        cumulative=True,
+    )
+    timings = ("hash", "verify", "queue_wait")
+    yield snapshot(
+        "password_hash_calls_total",
+        "bcrypt calls by phase",
+        ("phase",),
+        [((name,), stats[name]["count"]) for name in timings],
+        cumulative=True,
+    )
+    yield snapshot(
+        "password_hash_seconds_total",
+        "Time spent in bcrypt or waiting for a worker, by phase",
+        ("phase",),
+        [((name,), stats[name]["sum_seconds"]) for name in timings],
+        cumulative=True,
+    )
+    yield snapshot(
+        "password_hash_max_seconds",
+        "Slowest call so far, by phase",
+        ("phase",),
+        [((name,), stats[name]["max_seconds"]) for name in timings],
+    )
+
+
+registry.add_collector(collect_service_stats)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -1,6 +1,7 @@
+import os
 from pathlib import Path
 
-from pydantic import Field
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -13,12 +14,53 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = "5432"
     POSTGRES_DB: str = "auth_db"
 
-    JWT_SECRET: str = Field(..., min_length=32)
-    JWT_ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # Connection pool per process. Pre-ping costs a round trip on every
+    # checkout; with it off, recycle bounds how stale a connection can get
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Prepared statements cached per connection, 0 disables the cache
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Connecting through PgBouncer in transaction pooling mode: no
+    # statement cache and unique prepared statement names
+    DB_PGBOUNCER: bool = False
+
+    # RS256 or ES256 sign with the key ring below; HS256 with JWT_SECRET
+    JWT_ALGORITHM: str = "RS256"
+    JWT_SECRET: str = ""
+    # Private signing keys, shared by all auth replicas
+    JWT_KEYS_DIR: str = str(Path(__file__).resolve().parents[2] / "jwt_keys")
+    JWT_KEY_ROTATION_DAYS: int = 30
+    # How long a new key is only published before it signs tokens; must be
+    # longer than JWKS_REFRESH_SECONDS of the verifying services
+    JWT_KEY_ACTIVATION_DELAY_SECONDS: int = 900
+    # How often each process runs the rotation check and reloads the keys
+    JWT_KEY_CHECK_INTERVAL_SECONDS: int = 60
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+
+    # bcrypt worker threads and how many calls may wait for one before
+    # new logins are rejected with 503
+    PASSWORD_HASH_WORKERS: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    PASSWORD_HASH_MAX_PENDING: int = 64
 
     UVICORN_PORT: str = "8001"
 
+    @model_validator(mode="after")
+    def check_jwt_secret(self):
+        if self.JWT_ALGORITHM.startswith("HS") and len(self.JWT_SECRET) < 32:
+            raise ValueError("JWT_SECRET must be at least 32 characters for HS*")
+        # Deployments from before RS256 became the default set only the
+        # secret; fail at startup instead of rejecting every token
+        if self.JWT_SECRET and "JWT_ALGORITHM" not in self.model_fields_set:
+            raise ValueError(
+                "JWT_SECRET is set without JWT_ALGORITHM: set JWT_ALGORITHM=HS256 "
+                "to keep the shared secret, or drop JWT_SECRET to use RS256"
+            )
+        return self
+
     class Config:
         base_dir = Path(__file__).resolve().parents[2]
         env_file = str(base_dir / ".env")
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+import bcrypt
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class PasswordHasherOverloaded(Exception):
+    """
+    Raised when the hashing queue is full; the request should get a 503.
+    """
+
+
+def hash_password(password: str) -> str:
+    password_bytes = password.encode("utf-8")[:72]
+    return bcrypt.hashpw(password_bytes, bcrypt.gensalt()).decode("utf-8")
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    password_bytes = plain_password.encode("utf-8")[:72]
+    return bcrypt.checkpw(password_bytes, hashed_password.encode("utf-8"))
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded thread pool so it never blocks the event loop.
+
+    bcrypt releases the GIL while hashing, so throughput scales with the
+    number of workers up to the number of cores. At most `max_pending` calls
+    may wait for a worker; beyond that calls fail fast with
+    `PasswordHasherOverloaded` instead of stalling.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+        self._in_flight = 0
+        self.stats = {
+            "rejected": 0,
+            "hash": {"count": 0, "sum_seconds": 0.0, "max_seconds": 0.0},
+            "verify": {"count": 0, "sum_seconds": 0.0, "max_seconds": 0.0},
+            "queue_wait": {"count": 0, "sum_seconds": 0.0, "max_seconds": 0.0},
+        }
+
+    def _observe(self, name: str, seconds: float) -> None:
+        timing = self.stats[name]
+        timing["count"] += 1
+        timing["sum_seconds"] += seconds
+        timing["max_seconds"] = max(timing["max_seconds"], seconds)
+
+    async def _run(self, name: str, fn: Callable[..., T], *args) -> T:
+        if self._in_flight >= self.workers + self.max_pending:
+            self.stats["rejected"] += 1
+            raise PasswordHasherOverloaded()
+
+        self._in_flight += 1
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            return started, fn(*args), time.perf_counter() - started
+
+        try:
+            loop = asyncio.get_running_loop()
+            started, result, elapsed = await loop.run_in_executor(self._executor, timed)
+        finally:
+            self._in_flight -= 1
+        self._observe("queue_wait", started - submitted)
+        self._observe(name, elapsed)
+        return result
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(
+            "verify", verify_password, plain_password, hashed_password
+        )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -1,8 +1,19 @@
+import hashlib
+import secrets
+import time
 from datetime import datetime, timedelta, timezone
 
 from app.core.config import settings
+from app.core.metrics import registry
+from app.core.signing_keys import signing_keys
 from jose import jwt
 
+jwt_sign_duration = registry.histogram(
+    "jwt_sign_duration_seconds",
+    "Access token signing time",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025),
+)
+
 
 def create_access_token(data: dict, expires_delta: int | None = None):
     to_encode = data.copy()
@@ -11,7 +22,30 @@ def create_access_token(data: dict, expires_delta: int | None = None):
     )
     to_encode["exp"] = expire
 
-    encoded_jwt = jwt.encode(
-        to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
-    )
+    started = time.perf_counter()
+    if settings.JWT_ALGORITHM.startswith("HS"):
+        encoded_jwt = jwt.encode(
+            to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
+        )
+    else:
+        signing_key = signing_keys.active_key()
+        encoded_jwt = jwt.encode(
+            to_encode,
+            signing_key.key,
+            algorithm=settings.JWT_ALGORITHM,
+            headers={"kid": signing_key.kid},
+        )
+    jwt_sign_duration.observe(time.perf_counter() - started)
     return encoded_jwt
+
+
+def create_refresh_token() -> str:
+    return secrets.token_urlsafe(32)
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    Refresh tokens are high-entropy random strings, so a fast hash is enough
+    to keep them unusable if the table leaks.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
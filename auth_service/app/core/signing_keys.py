@@ -0,0 +1,188 @@
+import asyncio
+import fcntl
+import logging
+import os
+import secrets
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from app.core.config import settings
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import jwk
+from jose.backends.base import Key
+
+logger = logging.getLogger(settings.PROJECT_NAME)
+
+KID_TIME_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str
+    created_at: datetime
+    key: Key
+
+
+def _generate_private_pem(algorithm: str) -> bytes:
+    if algorithm == "RS256":
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    elif algorithm == "ES256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        raise ValueError(f"Unsupported signing algorithm: {algorithm}")
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+def _kid_created_at(kid: str) -> datetime:
+    return datetime.strptime(kid.split("-", 1)[0], KID_TIME_FORMAT).replace(
+        tzinfo=timezone.utc
+    )
+
+
+class SigningKeyRing:
+    """
+    Private signing keys stored as `<kid>.pem` files in one directory.
+
+    The kid starts with the key's creation time. A new key is published in the
+    JWKS right away but signs tokens only after `activation_delay`, so every
+    verifier has fetched it before the first token that needs it. A replaced
+    key stays published until the last token it signed has expired.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        algorithm: str,
+        rotation_interval: timedelta,
+        activation_delay: timedelta,
+        token_lifetime: timedelta,
+    ):
+        self.directory = Path(directory)
+        self.algorithm = algorithm
+        self.rotation_interval = rotation_interval
+        self.activation_delay = activation_delay
+        self.token_lifetime = token_lifetime
+        self._keys: List[SigningKey] = []
+        self._jwks: dict = {"keys": []}
+
+    @property
+    def keys(self) -> List[SigningKey]:
+        return self._keys
+
+    def load(self) -> None:
+        keys = []
+        for path in sorted(self.directory.glob("*.pem")):
+            try:
+                created_at = _kid_created_at(path.stem)
+            except ValueError:
+                logger.warning(f"Skipping signing key with malformed kid: {path.name}")
+                continue
+            keys.append(
+                SigningKey(
+                    kid=path.stem,
+                    created_at=created_at,
+                    key=jwk.construct(path.read_bytes(), self.algorithm),
+                )
+            )
+        keys.sort(key=lambda signing_key: signing_key.created_at)
+        # Swap whole lists so concurrent readers never see a partial key set
+        self._jwks = {
+            "keys": [
+                {
+                    **signing_key.key.public_key().to_dict(),
+                    "kid": signing_key.kid,
+                    "use": "sig",
+                }
+                for signing_key in keys
+            ]
+        }
+        self._keys = keys
+
+    def _is_active(self, signing_key: SigningKey, now: datetime) -> bool:
+        return signing_key.created_at + self.activation_delay <= now
+
+    def active_key(self, now: Optional[datetime] = None) -> SigningKey:
+        """
+        Newest key past its activation delay. Right after the very first key
+        is created there is no such key yet, so that one is used directly.
+        """
+        if not self._keys:
+            self.rotate()
+        now = now or datetime.now(timezone.utc)
+        active = [key for key in self._keys if self._is_active(key, now)]
+        return active[-1] if active else self._keys[0]
+
+    def jwks(self) -> dict:
+        return self._jwks
+
+    def _write_key(self, now: datetime) -> str:
+        kid = f"{now.strftime(KID_TIME_FORMAT)}-{secrets.token_hex(4)}"
+        fd = os.open(
+            self.directory / f"{kid}.pem", os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600
+        )
+        with os.fdopen(fd, "wb") as f:
+            f.write(_generate_private_pem(self.algorithm))
+        return kid
+
+    def rotate(self, force: bool = False, now: Optional[datetime] = None) -> dict:
+        """
+        Create a new key once the newest one is older than the rotation
+        interval (or unconditionally with `force`) and delete keys no token
+        can still be signed with. Safe to call from several processes that
+        share the directory.
+        """
+        now = now or datetime.now(timezone.utc)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        created, removed = None, []
+        with open(self.directory / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.load()
+            newest = self._keys[-1] if self._keys else None
+            if (
+                force
+                or newest is None
+                or (newest.created_at + self.rotation_interval <= now)
+            ):
+                created = self._write_key(now)
+
+            # A key is done once its successor has been active for longer
+            # than an access token lives
+            for current, successor in zip(self._keys, self._keys[1:]):
+                retired_at = (
+                    successor.created_at + self.activation_delay + self.token_lifetime
+                )
+                if retired_at <= now:
+                    (self.directory / f"{current.kid}.pem").unlink(missing_ok=True)
+                    removed.append(current.kid)
+            self.load()
+        return {"created": created, "removed": removed, "keys": len(self._keys)}
+
+
+async def run_key_rotation(ring: SigningKeyRing, interval: float) -> None:
+    """
+    Rotate on schedule and pick up keys created by other processes.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            result = await asyncio.to_thread(ring.rotate)
+            if result["created"] or result["removed"]:
+                logger.info(f"Signing keys rotated: {result}")
+        except Exception as exc:
+            logger.error(f"Signing key rotation failed: {exc}")
+
+
+signing_keys = SigningKeyRing(
+    directory=settings.JWT_KEYS_DIR,
+    algorithm=settings.JWT_ALGORITHM,
+    rotation_interval=timedelta(days=settings.JWT_KEY_ROTATION_DAYS),
+    activation_delay=timedelta(seconds=settings.JWT_KEY_ACTIVATION_DELAY_SECONDS),
+    token_lifetime=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+)
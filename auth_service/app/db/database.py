@@ -1,4 +1,6 @@
 from app.core.config import database_url
+from app.core.metrics import instrument_engine
+from app.db.pool import engine_options
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -6,10 +8,12 @@ Base = declarative_base()
 
 engine = create_async_engine(
     database_url,
-    pool_pre_ping=True,
     echo=False,
+    **engine_options("primary"),
 )
 
+instrument_engine(engine, "primary")
+
 async_session = async_sessionmaker(
     engine,
     expire_on_commit=False,
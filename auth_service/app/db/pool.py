@@ -0,0 +1,66 @@
+import time
+import uuid
+from typing import Dict
+
+from app.core.config import settings
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Per-engine checkout timings, keyed by engine name
+pool_stats: Dict[str, dict] = {}
+
+
+def timed_pool_class(name: str) -> type:
+    """
+    Queue pool that records how long each checkout took, including waiting
+    for a free connection, opening a new one and the pre-ping.
+    """
+    stats = pool_stats.setdefault(
+        name, {"count": 0, "sum_seconds": 0.0, "max_seconds": 0.0, "timeouts": 0}
+    )
+
+    class TimedQueuePool(AsyncAdaptedQueuePool):
+        def connect(self):
+            started = time.perf_counter()
+            try:
+                return super().connect()
+            except exc.TimeoutError:
+                stats["timeouts"] += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                stats["count"] += 1
+                stats["sum_seconds"] += elapsed
+                stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+
+    return TimedQueuePool
+
+
+def engine_options(name: str) -> dict:
+    """
+    Keyword arguments for `create_async_engine` from the DB_* settings.
+
+    Behind PgBouncer in transaction pooling mode a server connection may
+    change between statements, so named prepared statements cannot be
+    reused: both the asyncpg and the SQLAlchemy statement caches are turned
+    off and every statement gets a unique name.
+    """
+    if settings.DB_PGBOUNCER:
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    else:
+        connect_args = {
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        }
+    return {
+        "poolclass": timed_pool_class(name),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "connect_args": connect_args,
+    }
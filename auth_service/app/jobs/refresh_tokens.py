@@ -0,0 +1,35 @@
+"""
+Refresh token retention sweep: deletes tokens past their expiry, revoked or
+not. Run it periodically, e.g. daily from cron.
+
+Usage:
+    python -m app.jobs.refresh_tokens sweep [--batch-size N]
+"""
+
+import argparse
+import asyncio
+import json
+
+from app.db.database import async_session, engine
+from app.services.auth_service import sweep_refresh_tokens
+
+
+async def _run(batch_size: int) -> None:
+    try:
+        async with async_session() as db:
+            deleted = await sweep_refresh_tokens(db, batch_size)
+        print(json.dumps({"deleted": deleted}))
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["sweep"])
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(_run(args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+JWT signing key management.
+
+Running services rotate on their own schedule; `rotate --force` starts an
+unscheduled rotation, e.g. after a suspected key leak. The new key signs
+tokens once JWT_KEY_ACTIVATION_DELAY_SECONDS have passed.
+
+Usage:
+    python -m app.jobs.signing_keys list
+    python -m app.jobs.signing_keys rotate [--force]
+"""
+
+import argparse
+import json
+from datetime import datetime, timezone
+
+from app.core.signing_keys import signing_keys
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["list", "rotate"])
+    parser.add_argument("--force", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "rotate":
+        print(json.dumps(signing_keys.rotate(force=args.force)))
+        return
+
+    signing_keys.load()
+    now = datetime.now(timezone.utc)
+    active = signing_keys.active_key(now).kid if signing_keys.keys else None
+    for key in signing_keys.keys:
+        print(
+            json.dumps(
+                {
+                    "kid": key.kid,
+                    "created_at": key.created_at.isoformat(),
+                    "active": key.kid == active,
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
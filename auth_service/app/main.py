@@ -1,8 +1,47 @@
-from app.api.v1 import auth, users
+import asyncio
+import contextlib
+from contextlib import asynccontextmanager
+
+from app.api.v1 import auth, keys, metrics, users
 from app.core.config import settings
-from fastapi import FastAPI
+from app.core.metrics import MetricsMiddleware
+from app.core.password_hasher import PasswordHasherOverloaded, password_hasher
+from app.core.signing_keys import run_key_rotation, signing_keys
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    rotation = None
+    if not settings.JWT_ALGORITHM.startswith("HS"):
+        await asyncio.to_thread(signing_keys.rotate)
+        rotation = asyncio.create_task(
+            run_key_rotation(signing_keys, settings.JWT_KEY_CHECK_INTERVAL_SECONDS)
+        )
+    yield
+    if rotation is not None:
+        rotation.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await rotation
+    password_hasher.shutdown()
 
-app = FastAPI(title=settings.PROJECT_NAME)
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 app.include_router(auth.router)
 app.include_router(users.router)
+app.include_router(keys.router)
+app.include_router(metrics.router)
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(PasswordHasherOverloaded)
+async def password_hasher_overloaded_handler(
+    request: Request, exc: PasswordHasherOverloaded
+):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service is busy. Please retry the request."},
+        headers={"Retry-After": "1"},
+    )
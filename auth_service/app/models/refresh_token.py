@@ -0,0 +1,40 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.db.database import Base
+from sqlalchemy import UUID, DateTime, ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class RefreshToken(Base):
+    """
+    One issued refresh token. Only the SHA-256 of the token is stored.
+
+    Tokens rotated from the same login share a `family_id`; presenting an
+    already rotated token revokes the whole family.
+    """
+
+    __tablename__ = "refresh_tokens"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    token_hash: Mapped[str] = mapped_column(
+        String(64), unique=True, index=True, nullable=False
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
+    )
+    family_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), index=True, nullable=False
+    )
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), index=True, nullable=False
+    )
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
@@ -1,12 +1,115 @@
-from app.core.security import create_access_token
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import settings
+from app.core.security import (
+    create_access_token,
+    create_refresh_token,
+    hash_refresh_token,
+)
+from app.models.refresh_token import RefreshToken
+from app.schemas.auth import Token
 from app.services.user_service import authenticate_user
+from sqlalchemy import delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
+def _issue_tokens(db: AsyncSession, user_id: uuid.UUID, family_id: uuid.UUID) -> Token:
+    refresh_token = create_refresh_token()
+    db.add(
+        RefreshToken(
+            token_hash=hash_refresh_token(refresh_token),
+            user_id=user_id,
+            family_id=family_id,
+            expires_at=datetime.now(timezone.utc)
+            + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    return Token(
+        access_token=create_access_token({"sub": str(user_id)}),
+        expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        refresh_token=refresh_token,
+    )
+
+
 async def login(db: AsyncSession, username: str, password: str):
     user = await authenticate_user(db, username, password)
     if not user:
         return None
 
-    token = create_access_token({"sub": str(user.id)})
+    token = _issue_tokens(db, user.id, family_id=uuid.uuid4())
+    await db.commit()
+    return token
+
+
+async def refresh(db: AsyncSession, refresh_token: str):
+    """
+    Exchange a refresh token for a new token pair, without a password check.
+
+    The presented token is revoked (rotation). Presenting a token that was
+    already rotated means it leaked, so its whole family is revoked.
+    """
+    now = datetime.now(timezone.utc)
+    stored = (
+        (
+            await db.execute(
+                select(RefreshToken)
+                .where(RefreshToken.token_hash == hash_refresh_token(refresh_token))
+                .with_for_update()
+            )
+        )
+        .scalars()
+        .first()
+    )
+    if not stored:
+        return None
+
+    if stored.revoked_at is not None:
+        await db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.family_id == stored.family_id,
+                RefreshToken.revoked_at.is_(None),
+            )
+            .values(revoked_at=now)
+        )
+        await db.commit()
+        return None
+
+    if stored.expires_at <= now:
+        await db.rollback()
+        return None
+
+    stored.revoked_at = now
+    token = _issue_tokens(db, stored.user_id, stored.family_id)
+    await db.commit()
     return token
+
+
+async def sweep_refresh_tokens(db: AsyncSession, batch_size: int = 10000) -> int:
+    """
+    Delete expired refresh tokens in short batches. Returns the number of
+    deleted rows.
+
+    An expired token is refused whether or not its row exists, and replaying
+    it no longer matters for reuse detection. Revoked tokens stay until they
+    expire, so a replayed one still revokes its family.
+    """
+    now = datetime.now(timezone.utc)
+    deleted = 0
+    while True:
+        expired = (
+            select(RefreshToken.id)
+            .where(RefreshToken.expires_at < now)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        result = await db.execute(
+            delete(RefreshToken)
+            .where(RefreshToken.id.in_(expired))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
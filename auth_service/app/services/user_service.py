@@ -1,4 +1,4 @@
-import bcrypt
+from app.core.password_hasher import password_hasher
 from app.models.user import User
 from app.schemas.user import UserCreate
 from sqlalchemy import select
@@ -14,9 +14,7 @@ async def create_user(db: AsyncSession, user: UserCreate):
             status_code=400, detail="User with this username already exists"
         )
 
-    password_bytes = user.password.encode("utf-8")[:72]
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt).decode("utf-8")
+    hashed = await password_hasher.hash(user.password)
 
     db_user = User(username=user.username, hashed_password=hashed)
     db.add(db_user)
@@ -35,11 +33,6 @@ async def authenticate_user(db: AsyncSession, username: str, password: str):
     if not user:
         return None
 
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify(password, user.hashed_password):
         return None
     return user
-
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    password_bytes = plain_password.encode("utf-8")[:72]
-    return bcrypt.checkpw(password_bytes, hashed_password.encode("utf-8"))
@@ -0,0 +1,166 @@
+"""
+Password hashing / login load test.
+
+`hasher` mode (default, no database) runs bcrypt verifications through the
+worker pool for each pool size in `--workers` and reports throughput, latency
+percentiles and event loop lag. The `inline` row is the old behaviour of
+calling bcrypt directly on the event loop.
+
+`app` mode drives `POST /auth/login` of the in-process app against the
+database from `.env`.
+
+Usage:
+    uv run python -m benchmarks.login_load --workers 1,2,4,8 --requests 400
+    uv run --with httpx python -m benchmarks.login_load --mode app --requests 400
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+
+from app.core.password_hasher import PasswordHasher, hash_password, verify_password
+
+PASSWORD = "benchmark-password"
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(
+        0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1)
+    )
+    return sorted_values[rank]
+
+
+def summarize(latencies: list[float], elapsed: float, lags: list[float]) -> dict:
+    latencies.sort()
+    lags.sort()
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "loop_lag_p99_ms": round(percentile(lags, 99) * 1000, 3),
+        "loop_lag_max_ms": round((lags[-1] if lags else 0.0) * 1000, 3),
+    }
+
+
+async def measure_loop_lag(lags: list[float], stop: asyncio.Event) -> None:
+    """
+    Sample how late a 5 ms timer fires; a blocked loop shows up as lag.
+    """
+    interval = 0.005
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - started - interval))
+
+
+async def drive(call, requests: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    lags: list[float] = []
+    stop = asyncio.Event()
+    budget = [requests]
+
+    async def worker():
+        while budget[0] > 0:
+            budget[0] -= 1
+            started = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - started)
+
+    probe = asyncio.create_task(measure_loop_lag(lags, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    return summarize(latencies, elapsed, lags)
+
+
+async def run_hasher(args: argparse.Namespace) -> dict:
+    hashed = hash_password(PASSWORD)
+    results = {}
+
+    async def inline():
+        verify_password(PASSWORD, hashed)
+
+    results["inline"] = await drive(inline, args.requests, args.concurrency)
+
+    for workers in args.workers:
+        hasher = PasswordHasher(workers=workers, max_pending=args.requests)
+
+        async def pooled():
+            await hasher.verify(PASSWORD, hashed)
+
+        results[f"pool_{workers}"] = await drive(
+            pooled, args.requests, args.concurrency
+        )
+        hasher.shutdown()
+    return results
+
+
+async def run_app(args: argparse.Namespace) -> dict:
+    import httpx
+    from app.db.database import engine
+    from app.main import app
+
+    username = f"bench_{uuid.uuid4().hex[:12]}"
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=60
+    ) as client:
+        res = await client.post(
+            "/users/", json={"username": username, "password": PASSWORD}
+        )
+        res.raise_for_status()
+        statuses: dict[str, int] = {}
+
+        async def login():
+            res = await client.post(
+                "/auth/login", json={"username": username, "password": PASSWORD}
+            )
+            statuses[str(res.status_code)] = statuses.get(str(res.status_code), 0) + 1
+
+        result = await drive(login, args.requests, args.concurrency)
+        result["statuses"] = statuses
+    await engine.dispose()
+    return {"login": result}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--mode", choices=["hasher", "app"], default="hasher")
+    parser.add_argument(
+        "--workers",
+        type=lambda raw: [int(part) for part in raw.split(",")],
+        default=sorted({1, 2, 4, os.cpu_count() or 1}),
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    runner = run_hasher if args.mode == "hasher" else run_app
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "cpu_count": os.cpu_count(),
+        "mode": args.mode,
+        "results": asyncio.run(runner(args)),
+    }
+    rendered = json.dumps(report, indent=2)
+    print(rendered)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered)
+
+
+if __name__ == "__main__":
+    main()
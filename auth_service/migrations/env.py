@@ -5,6 +5,7 @@ from alembic import context
 
 from app.core.config import database_url
 from app.db.database import Base
+from app.models.refresh_token import RefreshToken  # noqa
 from app.models.user import User  # noqa
 
 # this is the Alembic Config object, which provides
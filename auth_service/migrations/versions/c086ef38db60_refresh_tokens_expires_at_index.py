@@ -0,0 +1,40 @@
+"""Refresh tokens expires_at index
+
+Revision ID: c086ef38db60
+Revises: 9ea7bbc52bee
+Create Date: 2026-10-18 21:40:12.503917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c086ef38db60'
+down_revision: Union[str, Sequence[str], None] = '9ea7bbc52bee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # For the expired token sweep; built without blocking logins and refreshes
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f('ix_refresh_tokens_expires_at'),
+            'refresh_tokens',
+            ['expires_at'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f('ix_refresh_tokens_expires_at'),
+            table_name='refresh_tokens',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,173 @@
+from app.core.metrics import CONTENT_TYPE, pool_metrics, registry, snapshot
+from app.core.rate_limit import LocalTokenBuckets, rate_limiter
+from app.core.security import token_cache
+from app.db.database import engine, replica_engine
+from app.db.pool import pool_stats
+from app.db.replica import replica_router
+from app.db.unit_of_work import retry_stats
+from app.services.account_cache import account_cache
+from app.services.atomic_operations import atomic_update_stats
+from app.services.fx_rates import fx_rates
+from app.services.group_commit import deposit_batcher
+from app.services.idempotency import idempotency_stats
+from fastapi import APIRouter, Response
+
+router = APIRouter(tags=["metrics"])
+
+
+def collect_service_stats():
+    engines = {"primary": engine}
+    if replica_engine is not None:
+        engines["replica"] = replica_engine
+    yield from pool_metrics(engines, pool_stats)
+
+    cache = token_cache.stats()
+    yield snapshot(
+        "jwt_cache_size", "Verified tokens cached", (), [((), cache["size"])]
+    )
+    yield snapshot(
+        "jwt_cache_lookups_total",
+        "Token cache lookups by result",
+        ("result",),
+        [(("hit",), cache["hits"]), (("miss",), cache["misses"])],
+        cumulative=True,
+    )
+    yield snapshot(
+        "account_cache_lookups_total",
+        "Account owner and account list lookups by result",
+        ("kind", "result"),
+        [
+            (tuple(key.split("_", 1)), value)
+            for key, value in account_cache.stats.items()
+            if key != "invalidations"
+        ],
+        cumulative=True,
+    )
+    yield snapshot(
+        "account_cache_invalidations_total",
+        "Account lists dropped after a balance change",
+        (),
+        [((), account_cache.stats["invalidations"])],
+        cumulative=True,
+    )
+    yield snapshot(
+        "rate_limit_decisions_total",
+        "Token bucket checks by scope and outcome",
+        ("scope", "outcome"),
+        [
+            (tuple(key.split(":", 1)), value)
+            for key, value in rate_limiter.stats.items()
+        ],
+        cumulative=True,
+    )
+    if isinstance(rate_limiter.backend, LocalTokenBuckets):
+        yield snapshot(
+            "rate_limit_buckets",
+            "Token buckets held by this process",
+            (),
+            [((), len(rate_limiter.backend))],
+        )
+    yield snapshot(
+        "db_transaction_retries_total",
+        "Money transactions re-run or given up on after a retryable SQLSTATE",
+        ("outcome", "sqlstate"),
+        [
+            (tuple(key.split(":", 1)) if ":" in key else (key, ""), value)
+            for key, value in retry_stats.items()
+        ],
+        cumulative=True,
+    )
+    yield snapshot(
+        "wallet_atomic_updates_total",
+        "Money operations by single-statement path or ORM fallback",
+        ("operation", "path"),
+        [
+            (tuple(key.split(":", 1)), value)
+            for key, value in atomic_update_stats.items()
+        ],
+        cumulative=True,
+    )
+    rates = fx_rates.current
+    yield snapshot(
+        "fx_rates_version",
+        "Version of the FX rate snapshot in use, 0 before the first load",
+        (),
+        [((), rates.version)],
+    )
+    yield snapshot(
+        "fx_rates_currencies", "Currencies with a rate", (), [((), len(rates.rates))]
+    )
+    yield snapshot(
+        "fx_rates_refreshes_total",
+        "FX rate reloads by outcome",
+        ("outcome",),
+        [
+            (("ok",), fx_rates.stats["refreshes"]),
+            (("failed",), fx_rates.stats["failures"]),
+        ],
+        cumulative=True,
+    )
+    yield snapshot(
+        "idempotency_conflicts_total",
+        "Requests answered from an existing idempotency key",
+        ("outcome",),
+        [((outcome,), value) for outcome, value in idempotency_stats.items()],
+        cumulative=True,
+    )
+    if deposit_batcher is not None:
+        yield snapshot(
+            "deposit_group_commits_total",
+            "Deposit batches committed or handed back as one transaction",
+            (),
+            [((), deposit_batcher.stats["batches"])],
+            cumulative=True,
+        )
+        yield snapshot(
+            "deposit_group_commit_items_total",
+            "Deposits by group commit outcome",
+            ("outcome",),
+            [
+                ((outcome,), deposit_batcher.stats[outcome])
+                for outcome in ("batched", "fallback")
+            ],
+            cumulative=True,
+        )
+    if replica_engine is not None:
+        yield snapshot(
+            "db_replica_healthy",
+            "1 while reads may be routed to the replica",
+            (),
+            [((), int(replica_router.healthy))],
+        )
+        yield snapshot(
+            "db_replica_lag_seconds",
+            "Replay lag seen by the last health check",
+            (),
+            [((), replica_router.lag_seconds)],
+        )
+        yield snapshot(
+            "db_replica_routing_total",
+            "Read routing decisions",
+            ("target",),
+            [
+                ((target,), value)
+                for target, value in replica_router.stats.items()
+                if target != "health_check_failures"
+            ],
+            cumulative=True,
+        )
+        yield snapshot(
+            "db_replica_health_check_failures_total",
+            "Failed replica health checks",
+            (),
+            [((), replica_router.stats["health_check_failures"])],
+            cumulative=True,
+        )
+
+
+registry.add_collector(collect_service_stats)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
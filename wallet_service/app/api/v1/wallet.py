@@ -1,155 +1,186 @@
+import math
 import uuid
-from typing import List
+from datetime import datetime, timedelta, timezone
+from typing import List, Literal, Optional
 
 from app.core.config import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.rate_limit import rate_limiter
+from app.core.responses import ORJSONResponse
+from app.core.security import token_cache
 from app.db.database import get_db
+from app.db.replica import replica_router
+from app.db.unit_of_work import run_in_transaction
 from app.models.account import Account
 from app.models.transaction import Transaction
 from app.schemas.schemas import (
+    AccountActivityResponse,
+    AccountCreateRequest,
     AccountResponse,
+    BalanceAtResponse,
+    BatchTransferRequest,
+    BatchTransferResponse,
     DepositRequest,
+    OperationResponse,
     TransactionResponse,
     TransferRequest,
     WithdrawRequest,
 )
-from fastapi import APIRouter, Depends, HTTPException, Query
+from app.services.account_cache import account_cache
+from app.services.analytics import account_activity, bucket_count
+from app.services.atomic_operations import deposit, transfer, withdraw
+from app.services.balance_snapshots import balance_at
+from app.services.batch_transfer import settle_transfer_batch
+from app.services.fx_rates import fx_rates
+from app.services.group_commit import deposit_batcher
+from app.services.idempotency import run_idempotent
+from app.services.statement_export import EXPORT_MEDIA_TYPES, stream_statement
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import jwt
 from pydantic import UUID4
-from sqlalchemy import select
+from sqlalchemy import literal, select, tuple_
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-router = APIRouter(prefix="/wallet", tags=["wallet"])
-
 security = HTTPBearer()
 
 
 async def get_current_user_id(
+    request: Request,
     auth: HTTPAuthorizationCredentials = Depends(security),
 ) -> UUID4:
     try:
-        token = auth.credentials
-        payload = jwt.decode(
-            token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]
-        )
-        user_id = payload.get("sub")
-        if not user_id:
-            raise HTTPException(status_code=401, detail="Invalid or expired token")
-        return user_id
+        user_id = token_cache.get_subject(auth.credentials)
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    if request.method != "GET":
+        replica_router.note_write(user_id)
+    return user_id
+
+
+async def get_read_db(request: Request, user_id: str = Depends(get_current_user_id)):
+    """
+    Session for read-only endpoints: the replica when it is healthy and the
+    user has not just written, otherwise the primary. Send
+    `X-Read-Consistency: strong` to always read from the primary.
+    """
+    strong = request.headers.get("X-Read-Consistency", "").lower() == "strong"
+    async with replica_router.session(user_id, strong) as session:
+        yield session
+
+
+async def enforce_rate_limit(
+    request: Request, user_id: str = Depends(get_current_user_id)
+) -> None:
+    """
+    Answer 429 once the caller or the account it acts on (the `account_id`
+    path parameter, else `account_id` / `from_account_id` of the body) has
+    used up its tokens for the route. Runs before any database work; the
+    body was already read and parsed by FastAPI.
+    """
+    account_id = request.path_params.get("account_id")
+    if account_id is None and request.method == "POST":
+        try:
+            body = await request.json()
+        except ValueError:
+            body = None
+        if isinstance(body, dict):
+            account_id = body.get("account_id") or body.get("from_account_id")
+    if account_id is not None:
+        try:
+            account_id = str(uuid.UUID(str(account_id)))
+        except ValueError:
+            # Rejected by validation anyway, don't key buckets on it
+            account_id = None
+
+    route = f"{request.method} {request.scope['route'].path}"
+    retry_after = await rate_limiter.check(route, user_id, account_id)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+router = APIRouter(
+    prefix="/wallet", tags=["wallet"], dependencies=[Depends(enforce_rate_limit)]
+)
 
 
 @router.get("/accounts", response_model=List[AccountResponse])
 async def list_accounts(
-    user_id: str = Depends(get_current_user_id), db: AsyncSession = Depends(get_db)
+    user_id: str = Depends(get_current_user_id), db: AsyncSession = Depends(get_read_db)
 ):
-    result = await db.execute(
-        select(Account).where(Account.user_id == uuid.UUID(user_id))
-    )
-    return result.scalars().all()
+    # Rows come straight from a column select, no model validation needed
+    return ORJSONResponse(await account_cache.accounts(db, user_id))
 
 
 @router.post("/accounts", response_model=AccountResponse, status_code=201)
 async def create_account(
-    user_id: str = Depends(get_current_user_id), db: AsyncSession = Depends(get_db)
+    req: Optional[AccountCreateRequest] = None,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
 ):
-    new_account = Account(user_id=uuid.UUID(user_id))
+    """
+    Open an account in any currency that has an exchange rate, the base
+    currency by default.
+    """
+    currency = (req and req.currency) or settings.FX_BASE_CURRENCY
+    if currency not in fx_rates.current.rates:
+        raise HTTPException(status_code=400, detail=f"Unsupported currency {currency}")
+    new_account = Account(user_id=uuid.UUID(user_id), currency=currency)
     db.add(new_account)
     await db.commit()
     await db.refresh(new_account)
+    await account_cache.invalidate_balances([new_account.user_id])
     return new_account
 
 
-@router.post("/deposit")
+@router.post("/deposit", response_model=OperationResponse)
 async def deposit_funds(
     req: DepositRequest,
     user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    # Use FOR UPDATE to lock the account row
-    res = await db.execute(
-        select(Account).where(Account.id == req.account_id).with_for_update()
-    )
-    account = res.scalars().first()
-
-    if not account or str(account.user_id) != str(user_id):
-        raise HTTPException(status_code=404, detail="Account not found")
-
-    account.balance += req.amount
-    db.add(
-        Transaction(
-            account_id=account.id,
-            amount=req.amount,
-            type="DEPOSIT",
-            idempotency_key=req.idempotency_key,
-        )
-    )
+    if deposit_batcher is not None:
+        result = await deposit_batcher.submit(req, user_id)
+        if result is not None:
+            return result
+    return await run_idempotent(db, req, user_id, deposit)
 
-    try:
-        await db.commit()
-    except IntegrityError:
-        await db.rollback()
-        raise HTTPException(status_code=409, detail="Transaction already processed")
-    await db.refresh(account)
-    return {"status": "success", "new_balance": account.balance}
 
-
-@router.post("/transfer")
+@router.post("/transfer", response_model=OperationResponse)
 async def transfer_funds(
     req: TransferRequest,
     user_id: str = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db),
 ):
-    # Block both accounts in a consistent order to prevent deadlocks
-    ids = sorted([req.from_account_id, req.to_account_id])
-    res = await db.execute(select(Account).where(Account.id.in_(ids)).with_for_update())
-    accounts = {str(a.id): a for a in res.scalars().all()}
-
-    if len(accounts) < 2:
-        raise HTTPException(status_code=404, detail="One or both accounts not found")
-
-    sender = accounts[str(req.from_account_id)]
-    receiver = accounts[str(req.to_account_id)]
+    return await run_idempotent(db, req, user_id, transfer)
 
-    if str(sender.user_id) != str(user_id):
-        raise HTTPException(
-            status_code=403, detail="Forbidden: You don't own the source account"
-        )
-
-    if sender.balance < req.amount:
-        raise HTTPException(status_code=400, detail="Insufficient funds")
-
-    sender.balance -= req.amount
-    receiver.balance += req.amount
-
-    db.add(
-        Transaction(
-            account_id=sender.id,
-            amount=-req.amount,
-            type="TRANSFER_OUT",
-            idempotency_key=req.idempotency_key,
-        )
-    )
-    db.add(
-        Transaction(
-            account_id=receiver.id,
-            amount=req.amount,
-            type="TRANSFER_IN",
-            idempotency_key=f"__internal__:tx:{req.idempotency_key}:in",
-        )
-    )
 
+@router.post("/transfers/batch", response_model=BatchTransferResponse)
+async def transfer_funds_batch(
+    req: BatchTransferRequest,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Settle many transfers in one transaction with a per-item result.
+    """
     try:
-        await db.commit()
+        results = await run_in_transaction(
+            db, settle_transfer_batch, user_id, req.transfers
+        )
     except IntegrityError:
-        await db.rollback()
         raise HTTPException(status_code=409, detail="Transaction already processed")
-    return {"status": "success", "new_balance": sender.balance}
+    return BatchTransferResponse(results=results)
 
 
-@router.post("/withdraw")
+@router.post("/withdraw", response_model=OperationResponse)
 async def withdraw_funds(
     req: WithdrawRequest,
     user_id: str = Depends(get_current_user_id),
@@ -158,34 +189,7 @@ async def withdraw_funds(
     """
     Withdraw funds from a user's account with idempotency check and row locking.
     """
-    # 1. Block the account row and withdraw funds
-    res = await db.execute(
-        select(Account).where(Account.id == req.account_id).with_for_update()
-    )
-    account = res.scalars().first()
-
-    if not account or str(account.user_id) != str(user_id):
-        raise HTTPException(status_code=404, detail="Account not found")
-
-    if account.balance < req.amount:
-        raise HTTPException(status_code=400, detail="Insufficient funds")
-
-    account.balance -= req.amount
-    db.add(
-        Transaction(
-            account_id=account.id,
-            amount=-req.amount,
-            type="WITHDRAW",
-            idempotency_key=req.idempotency_key,
-        )
-    )
-
-    try:
-        await db.commit()
-    except IntegrityError:
-        await db.rollback()
-        raise HTTPException(status_code=409, detail="Transaction already processed")
-    return {"status": "success", "new_balance": account.balance}
+    return await run_idempotent(db, req, user_id, withdraw)
 
 
 @router.get(
@@ -195,27 +199,145 @@ async def get_transaction_history(
     account_id: UUID4,
     limit: int = Query(default=20, ge=1, le=100),
     offset: int = Query(default=0, ge=0, le=10000),
+    cursor: Optional[str] = Query(default=None, max_length=256),
     user_id: str = Depends(get_current_user_id),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
     """
     Getting transaction history for a specific account with pagination.
+
+    Pass the `X-Next-Cursor` header of a page as `cursor` to fetch the next
+    one; cursor mode has no depth limit and ignores `offset`.
+
+    Selects only the response columns and renders the rows directly,
+    without building entities or validating them through the model.
     """
     # First, verify that the account belongs to the user
-    acc_check = await db.execute(
-        select(Account).where(
-            Account.id == account_id, Account.user_id == uuid.UUID(user_id)
-        )
-    )
-    if not acc_check.scalars().first():
+    if not await account_cache.is_owner(db, account_id, user_id):
         raise HTTPException(status_code=403, detail="Access denied to this account")
 
-    # Request transaction history with pagination, ordered by most recent first
-    result = await db.execute(
-        select(Transaction)
+    # Request transaction history, ordered by most recent first
+    query = (
+        select(
+            Transaction.id,
+            Transaction.account_id,
+            Transaction.amount,
+            Transaction.type,
+            Transaction.fx_rate,
+            Transaction.created_at,
+        )
         .where(Transaction.account_id == account_id)
-        .order_by(Transaction.created_at.desc())
+        .order_by(Transaction.created_at.desc(), Transaction.id.desc())
         .limit(limit)
-        .offset(offset)
     )
-    return result.scalars().all()
+    if cursor is not None:
+        try:
+            after_created_at, after_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(
+            tuple_(Transaction.created_at, Transaction.id)
+            < tuple_(
+                literal(after_created_at, Transaction.created_at.type),
+                literal(after_id, Transaction.id.type),
+            )
+        )
+    else:
+        query = query.offset(offset)
+
+    result = await db.execute(query)
+    transactions = [dict(row._mapping) for row in result]
+    headers = {}
+    if len(transactions) == limit:
+        last = transactions[-1]
+        headers["X-Next-Cursor"] = encode_cursor(last["created_at"], last["id"])
+    return ORJSONResponse(transactions, headers=headers)
+
+
+@router.get("/accounts/{account_id}/statement")
+async def export_statement(
+    account_id: UUID4,
+    export_format: Literal["csv", "ndjson"] = Query(default="csv", alias="format"),
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Stream the full ledger of an account, oldest first.
+    """
+    if not await account_cache.is_owner(db, account_id, user_id):
+        raise HTTPException(status_code=403, detail="Access denied to this account")
+    # The export runs on its own connection to the same server, don't pin
+    # this one for its duration
+    bind = db.bind
+    await db.close()
+
+    return StreamingResponse(
+        stream_statement(account_id, export_format, since, until, bind),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{account_id}.{export_format}"'
+        },
+    )
+
+
+@router.get("/accounts/{account_id}/balance", response_model=BalanceAtResponse)
+async def get_balance_at(
+    account_id: UUID4,
+    at: Optional[datetime] = Query(default=None),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Ledger balance of an account at a point in time (now by default).
+    """
+    if not await account_cache.is_owner(db, account_id, user_id):
+        raise HTTPException(status_code=403, detail="Access denied to this account")
+
+    if at is None:
+        at = datetime.now(timezone.utc)
+    elif at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    balance = await balance_at(db, account_id, at)
+    return BalanceAtResponse(account_id=account_id, balance=balance, at=at)
+
+
+@router.get("/accounts/{account_id}/activity", response_model=AccountActivityResponse)
+async def get_account_activity(
+    account_id: UUID4,
+    bucket: Literal["day", "week", "month"] = Query(default="month"),
+    since: Optional[datetime] = Query(default=None),
+    until: Optional[datetime] = Query(default=None),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    Inflow, outflow and net per time bucket and transaction type, aggregated
+    in the database. Defaults to the last 12 months; buckets are UTC.
+    """
+    if not await account_cache.is_owner(db, account_id, user_id):
+        raise HTTPException(status_code=403, detail="Access denied to this account")
+
+    if until is None:
+        until = datetime.now(timezone.utc)
+    elif until.tzinfo is None:
+        until = until.replace(tzinfo=timezone.utc)
+    if since is None:
+        since = until - timedelta(days=365)
+    elif since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    if bucket_count(bucket, since, until) > settings.ANALYTICS_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400, detail="Range too long for this bucket size"
+        )
+
+    return AccountActivityResponse(
+        account_id=account_id,
+        bucket=bucket,
+        since=since,
+        until=until,
+        buckets=await account_activity(db, account_id, bucket, since, until),
+    )
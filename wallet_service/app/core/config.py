@@ -1,6 +1,7 @@
 from pathlib import Path
+from typing import Dict, Tuple
 
-from pydantic import Field
+from pydantic import Field, model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -13,11 +14,158 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = "5432"
     POSTGRES_DB: str = "wallet_db"
 
-    JWT_SECRET: str = Field(..., min_length=32)
-    JWT_ALGORITHM: str = "HS256"
+    # Connection pool per process. Pre-ping costs a round trip on every
+    # checkout; with it off, recycle bounds how stale a connection can get
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Prepared statements cached per connection, 0 disables the cache
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Connecting through PgBouncer in transaction pooling mode: no
+    # statement cache and unique prepared statement names
+    DB_PGBOUNCER: bool = False
+
+    # Streaming read replica for read-only endpoints, empty host disables it
+    POSTGRES_REPLICA_HOST: str = ""
+    POSTGRES_REPLICA_PORT: str = "5432"
+    # Reads fall back to the primary while the replica lags more than this
+    # or fails its periodic health check
+    REPLICA_MAX_LAG_SECONDS: float = 5.0
+    REPLICA_HEALTH_CHECK_SECONDS: int = 5
+    # After a write, the same user's reads go to the primary for this long
+    READ_YOUR_WRITES_SECONDS: int = 10
+
+    # RS256 or ES256 verify against the auth service's JWKS; HS256 against
+    # the shared JWT_SECRET
+    JWT_ALGORITHM: str = "RS256"
+    JWT_SECRET: str = ""
+    JWKS_URL: str = "http://localhost:8001/.well-known/jwks.json"
+    # Background refresh period of the cached key set; must be shorter than
+    # JWT_KEY_ACTIVATION_DELAY_SECONDS of the auth service
+    JWKS_REFRESH_SECONDS: int = 300
+    # Max number of verified tokens kept in memory, 0 disables the cache
+    JWT_CACHE_SIZE: int = 10000
+
+    # Account owners and per-user account lists kept in memory; lists carry
+    # balances, so they also expire after the ttl (0 disables list caching)
+    ACCOUNT_CACHE_SIZE: int = 100000
+    ACCOUNT_LIST_CACHE_TTL_SECONDS: float = 5.0
+
+    # Re-runs of a money transaction aborted by a deadlock, serialization
+    # failure or lock timeout, with full-jitter exponential backoff
+    DB_RETRY_MAX_ATTEMPTS: int = 3
+    DB_RETRY_BASE_DELAY_MS: int = 10
+    DB_RETRY_MAX_DELAY_MS: int = 200
+
+    # Idempotency store: how long an unfinished claim blocks duplicates and
+    # how long completed responses are kept for replay
+    IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS: int = 60
+    IDEMPOTENCY_RETENTION_HOURS: int = 72
+    # Ledger idempotency keys stay unique for this long (transaction_keys);
+    # must cover IDEMPOTENCY_RETENTION_HOURS
+    LEDGER_KEY_RETENTION_DAYS: int = 30
+
+    # Monthly ledger partitions: how many future months exist ahead of time,
+    # how many past months stay attached before archival, and where archived
+    # partitions are written as gzipped CSV
+    LEDGER_PARTITIONS_AHEAD: int = 3
+    # How often the service creates missing future partitions. There is no
+    # DEFAULT partition: with 0, `python -m app.jobs.ledger_partitions create`
+    # must run from cron well within LEDGER_PARTITIONS_AHEAD months, or every
+    # ledger insert fails once the last partition is passed
+    LEDGER_PARTITION_CHECK_SECONDS: int = 3600
+    LEDGER_HOT_MONTHS: int = 12
+    LEDGER_ARCHIVE_DIR: str = "ledger_archive"
+
+    # Outbox relay: in-process sink ("", "stdout" or "file"), empty leaves it
+    # to the CLI job
+    OUTBOX_SINK: str = ""
+    OUTBOX_FILE_PATH: str = "outbox_events.ndjson"
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_POLL_INTERVAL_MS: int = 500
+
+    # In-process snapshot compaction period, 0 leaves it to the CLI job
+    BALANCE_SNAPSHOT_INTERVAL_SECONDS: int = 0
+    # How far the snapshot watermark trails "now"
+    BALANCE_SNAPSHOT_LAG_SECONDS: int = 300
+
+    # Upper bound for sub-balance buckets of a hot account
+    HOT_ACCOUNT_MAX_BUCKETS: int = 64
+
+    # Upper bound of time buckets one analytics request may span
+    ANALYTICS_MAX_BUCKETS: int = 400
+
+    # Deposit, withdraw and transfer on regular accounts as one conditional
+    # UPDATE + ledger INSERT statement instead of ORM read-modify-write
+    ATOMIC_BALANCE_UPDATES: bool = True
+
+    # Group commit: deposits arriving within the linger time share one
+    # transaction, up to the batch size
+    DEPOSIT_GROUP_COMMIT: bool = False
+    DEPOSIT_BATCH_MAX_SIZE: int = 100
+    DEPOSIT_BATCH_LINGER_MS: float = 2.0
+
+    # Currency of new accounts by default and of the rate table: each rate
+    # is the value of one unit of a currency in the base currency
+    FX_BASE_CURRENCY: str = "RUB"
+    # JSON file {"USD": "92.5", ...} to read rates from instead of the
+    # fx_rates table
+    FX_RATES_FILE: str = ""
+    # How often rates are reloaded, 0 loads them only at startup
+    FX_RATES_REFRESH_SECONDS: float = 60.0
+
+    # Token buckets per route, "<METHOD> <path template>" or "*" for routes
+    # without an entry: {"user" | "account": [tokens per second, burst]}.
+    # An empty object turns rate limiting off
+    RATE_LIMITS: Dict[str, Dict[str, Tuple[float, float]]] = {
+        "POST /wallet/deposit": {"user": (20, 40), "account": (10, 20)},
+        "POST /wallet/withdraw": {"user": (20, 40), "account": (10, 20)},
+        "POST /wallet/transfer": {"user": (20, 40), "account": (10, 20)},
+        "POST /wallet/transfers/batch": {"user": (1, 5)},
+        "GET /wallet/accounts/{account_id}/statement": {"user": (0.2, 3)},
+        "*": {"user": (50, 100)},
+    }
+    # Most buckets one process keeps; idle ones are dropped first
+    RATE_LIMIT_MAX_KEYS: int = 100000
 
     UVICORN_PORT: str = "8002"
 
+    @model_validator(mode="after")
+    def check_jwt_secret(self):
+        if self.JWT_ALGORITHM.startswith("HS") and len(self.JWT_SECRET) < 32:
+            raise ValueError("JWT_SECRET must be at least 32 characters for HS*")
+        # Deployments from before RS256 became the default set only the
+        # secret; fail at startup instead of rejecting every token
+        if self.JWT_SECRET and "JWT_ALGORITHM" not in self.model_fields_set:
+            raise ValueError(
+                "JWT_SECRET is set without JWT_ALGORITHM: set JWT_ALGORITHM=HS256 "
+                "to keep the shared secret, or drop JWT_SECRET to use RS256"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def check_ledger_key_retention(self):
+        if self.LEDGER_KEY_RETENTION_DAYS * 24 < self.IDEMPOTENCY_RETENTION_HOURS:
+            raise ValueError(
+                "LEDGER_KEY_RETENTION_DAYS must cover IDEMPOTENCY_RETENTION_HOURS"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def check_rate_limits(self):
+        for route, limits in self.RATE_LIMITS.items():
+            for scope, (rate, burst) in limits.items():
+                if scope not in ("user", "account"):
+                    raise ValueError(f"RATE_LIMITS[{route!r}]: unknown scope {scope!r}")
+                if rate <= 0 or burst < 1:
+                    raise ValueError(
+                        f"RATE_LIMITS[{route!r}][{scope!r}]: rate must be positive "
+                        "and burst at least 1"
+                    )
+        return self
+
     class Config:
         base_dir = Path(__file__).resolve().parents[2]
         env_file = str(base_dir / ".env")
@@ -27,3 +175,9 @@ settings = Settings()
 
 # Get the database URL
 database_url = f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_HOST}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
+
+replica_database_url = (
+    f"postgresql+asyncpg://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_REPLICA_HOST}:{settings.POSTGRES_REPLICA_PORT}/{settings.POSTGRES_DB}"
+    if settings.POSTGRES_REPLICA_HOST
+    else None
+)
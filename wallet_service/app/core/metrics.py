@@ -0,0 +1,339 @@
+import bisect
+import re
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latencies, from sub-millisecond cache hits to stuck lock waits
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, tuple(labelnames))
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for labels, value in self._values.items():
+            lines.append(
+                f"{self.name}{_format_labels(self.labelnames, labels)} "
+                f"{_format_value(value)}"
+            )
+        return lines
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    """
+    Cumulative-bucket histogram. `observe` is a bisect plus three additions,
+    cheap enough for every request and every query.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, tuple(labelnames))
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        bucket_names = self.labelnames + ("le",)
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket"
+                    f"{_format_labels(bucket_names, labels + (_format_value(bound),))}"
+                    f" {cumulative}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Metrics of this process in the Prometheus text format.
+
+    Collectors are called at scrape time and turn existing in-process stats
+    into gauges, so hot paths that already keep counters pay nothing extra.
+    """
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Metric]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        metrics = list(self._metrics)
+        for collector in self._collectors:
+            metrics.extend(collector())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total",
+    "HTTP requests by route and status",
+    ("method", "route", "status"),
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+http_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests being served", ("method",)
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Database statement latency", ("engine", "statement")
+)
+db_lock_query_duration = registry.histogram(
+    "db_locking_query_duration_seconds",
+    "Latency of SELECT ... FOR UPDATE/SHARE statements, mostly row lock wait",
+    ("engine",),
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware: per-route latency and status, in-flight requests.
+
+    Routes are labelled by their path template so ids in the URL do not
+    create new series; requests no route matched share one label.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = ["500"]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        http_in_flight.inc(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec(method)
+            route = scope.get("route")
+            route_name = getattr(route, "path", None) or "unmatched"
+            http_request_duration.observe(elapsed, method, route_name)
+            http_requests.inc(method, route_name, status[0])
+
+
+_LOCKING_CLAUSE = re.compile(r"\bFOR (?:NO KEY UPDATE|UPDATE|KEY SHARE|SHARE)\b")
+
+
+@lru_cache(maxsize=2048)
+def _classify_statement(statement: str) -> Tuple[str, bool]:
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    if verb not in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+        verb = "OTHER"
+    return verb, bool(_LOCKING_CLAUSE.search(statement))
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """
+    Time every statement of `engine` through cursor execution events.
+    Statement strings repeat, so classifying them is a cache lookup.
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+        verb, locking = _classify_statement(statement)
+        db_query_duration.observe(elapsed, name, verb)
+        if locking:
+            db_lock_query_duration.observe(elapsed, name)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def snapshot(
+    name: str,
+    documentation: str,
+    labelnames: Tuple[str, ...],
+    values: Iterable[Tuple[LabelValues, Optional[float]]],
+    cumulative: bool = False,
+) -> Metric:
+    """
+    Counter (`cumulative`) or gauge built from in-process stats at scrape
+    time. `None` values are skipped.
+    """
+    metric = (Counter if cumulative else Gauge)(name, documentation, labelnames)
+    for labels, value in values:
+        if value is not None:
+            metric._values[labels] = value
+    return metric
+
+
+def pool_metrics(engines: Dict[str, AsyncEngine], checkout_stats: Dict[str, dict]):
+    """
+    Pool saturation: connections in use against the pool size, plus the
+    checkout timings recorded by `app.db.pool`.
+    """
+    pools = {name: engine.pool for name, engine in engines.items()}
+    yield snapshot(
+        "db_pool_size",
+        "Configured pool size",
+        ("engine",),
+        [((name,), pool.size()) for name, pool in pools.items()],
+    )
+    yield snapshot(
+        "db_pool_checked_out",
+        "Connections currently checked out",
+        ("engine",),
+        [((name,), pool.checkedout()) for name, pool in pools.items()],
+    )
+    yield snapshot(
+        "db_pool_overflow",
+        "Connections open beyond the pool size",
+        ("engine",),
+        [((name,), max(0, pool.overflow())) for name, pool in pools.items()],
+    )
+    for field, metric_name, documentation in (
+        ("count", "db_pool_checkouts_total", "Pool checkouts"),
+        (
+            "sum_seconds",
+            "db_pool_checkout_seconds_total",
+            "Total time spent checking out connections",
+        ),
+        (
+            "timeouts",
+            "db_pool_checkout_timeouts_total",
+            "Checkouts that timed out waiting for a connection",
+        ),
+    ):
+        yield snapshot(
+            metric_name,
+            documentation,
+            ("engine",),
+            [((name,), stats[field]) for name, stats in checkout_stats.items()],
+            cumulative=True,
+        )
+    yield snapshot(
+        "db_pool_checkout_max_seconds",
+        "Slowest pool checkout so far",
+        ("engine",),
+        [((name,), stats["max_seconds"]) for name, stats in checkout_stats.items()],
+    )
@@ -0,0 +1,144 @@
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, List, Optional, Protocol, Tuple
+
+from app.core.config import settings
+
+
+class RateLimitBackend(Protocol):
+    """
+    Store of token buckets behind `RateLimiter`. The in-process buckets are
+    the default; a shared store (e.g. Redis running the same refill-and-take
+    as one script) makes the limits fleet-wide.
+    """
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """
+        Take one token from the bucket of `key`. Returns 0 if it was taken,
+        otherwise the seconds until one is available.
+        """
+        ...
+
+    async def refund(self, key: str, rate: float, burst: float) -> None:
+        """
+        Put back a token taken from the bucket of `key` for a request that
+        was then denied by another bucket.
+        """
+        ...
+
+
+class LocalTokenBuckets:
+    """
+    Token buckets of this process: one `[tokens, updated_at, full_at]` list
+    per active key, updated in place.
+
+    A bucket idle long enough to refill completely is the same as no bucket,
+    so up to two such buckets are dropped from the least recently used end on
+    every call. `maxsize` bounds memory when keys arrive faster than they
+    go idle.
+    """
+
+    def __init__(
+        self, maxsize: int = 100000, clock: Callable[[], float] = time.monotonic
+    ):
+        self.maxsize = maxsize
+        self.clock = clock
+        self._buckets: OrderedDict[str, List[float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _evict(self, now: float) -> None:
+        for _ in range(2):
+            if not self._buckets:
+                return
+            key = next(iter(self._buckets))
+            if self._buckets[key][2] > now and len(self._buckets) < self.maxsize:
+                return
+            del self._buckets[key]
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        now = self.clock()
+        self._evict(now)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [burst, now, now]
+            tokens = burst
+        else:
+            self._buckets.move_to_end(key)
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        bucket[0] = tokens
+        bucket[1] = now
+        bucket[2] = now + (burst - tokens) / rate
+        return wait
+
+    async def refund(self, key: str, rate: float, burst: float) -> None:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            # Evicted as full: nothing to give back
+            return
+        now = self.clock()
+        tokens = min(burst, bucket[0] + (now - bucket[1]) * rate + 1)
+        bucket[0] = tokens
+        bucket[1] = now
+        bucket[2] = now + (burst - tokens) / rate
+
+
+class RateLimiter:
+    """
+    Admission control per route: a token bucket per user and one per
+    account the request acts on, as configured in `rules`
+    (`{"<METHOD> <path>": {"user": (rate, burst), "account": ...}}`, `"*"`
+    for routes without their own entry).
+
+    Rates are tokens per second and every request takes one token, so
+    `burst` requests may arrive at once and `rate` per second after that.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        rules: Dict[str, Dict[str, Tuple[float, float]]],
+    ):
+        self.backend = backend
+        self.rules = rules
+        # Keys: "<scope>:allowed", "<scope>:limited"
+        self.stats = Counter()
+
+    async def check(
+        self, route: str, user_id: str, account_id: Optional[str] = None
+    ) -> Optional[float]:
+        """
+        Take a token from each bucket of the request. Returns None if it may
+        proceed, otherwise the seconds after which to retry; a denied request
+        gives back the tokens it already took, so a limited account does not
+        also drain its user's bucket.
+        """
+        limits = self.rules.get(route) or self.rules.get("*") or {}
+        taken = []
+        for scope, subject in (("user", user_id), ("account", account_id)):
+            limit = limits.get(scope)
+            if limit is None or subject is None:
+                continue
+            key = f"{scope}:{route}:{subject}"
+            wait = await self.backend.take(key, *limit)
+            if wait > 0:
+                self.stats[f"{scope}:limited"] += 1
+                for key, limit in taken:
+                    await self.backend.refund(key, *limit)
+                return wait
+            self.stats[f"{scope}:allowed"] += 1
+            taken.append((key, limit))
+        return None
+
+
+rate_limiter = RateLimiter(
+    backend=LocalTokenBuckets(maxsize=settings.RATE_LIMIT_MAX_KEYS),
+    rules=settings.RATE_LIMITS,
+)
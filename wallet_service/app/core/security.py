@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import urllib.request
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Protocol, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import registry
+from jose import jwk, jwt
+from jose.backends.base import Key
+from jose.exceptions import JWTError
+
+logger = logging.getLogger(settings.PROJECT_NAME)
+
+jwt_verify_duration = registry.histogram(
+    "jwt_verify_duration_seconds",
+    "Signature verification and decoding of tokens missing from the cache",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+
+
+class TokenVerifier(Protocol):
+    """
+    Verifies a raw JWT and returns its claims. Raises on invalid tokens.
+    """
+
+    def __call__(self, token: str) -> dict: ...
+
+
+class JoseTokenVerifier:
+    def __init__(self, secret: str, algorithms: list[str]):
+        self.secret = secret
+        self.algorithms = algorithms
+
+    def __call__(self, token: str) -> dict:
+        return jwt.decode(token, self.secret, algorithms=self.algorithms)
+
+
+class JwksTokenVerifier:
+    """
+    Verifies tokens against an in-memory copy of the issuer's JWKS, picking
+    the key by the token's `kid`. Verification never leaves the process; the
+    key set is replaced as a whole by `JwksRefresher`.
+    """
+
+    def __init__(self, algorithms: list[str]):
+        self.algorithms = algorithms
+        self._keys: Dict[str, Key] = {}
+        self.unknown_kid = asyncio.Event()
+
+    @property
+    def key_ids(self) -> Set[str]:
+        return set(self._keys)
+
+    def set_keys(self, jwks: dict) -> Set[str]:
+        """
+        Install a new key set. Returns the key ids that were dropped.
+        """
+        keys = {}
+        for data in jwks.get("keys", []):
+            kid = data.get("kid")
+            algorithm = data.get("alg")
+            if not kid or algorithm not in self.algorithms:
+                continue
+            keys[kid] = jwk.construct(data, algorithm)
+        removed = set(self._keys) - set(keys)
+        self._keys = keys
+        return removed
+
+    def __call__(self, token: str) -> dict:
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self._keys.get(kid)
+        if key is None:
+            # Ask the refresher for an early update; this token still fails
+            self.unknown_kid.set()
+            raise JWTError("Unknown signing key")
+        return jwt.decode(token, key, algorithms=self.algorithms)
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of already verified tokens.
+
+    Keys are SHA-256 digests of the raw token, so the cache never holds
+    bearer credentials. Entries live until the token's own `exp` claim.
+    """
+
+    def __init__(
+        self,
+        verifier: TokenVerifier,
+        maxsize: int = 10000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.verifier = verifier
+        self.maxsize = maxsize
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[bytes, Tuple[str, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _verify(self, token: str) -> dict:
+        started = time.perf_counter()
+        try:
+            return self.verifier(token)
+        finally:
+            jwt_verify_duration.observe(time.perf_counter() - started)
+
+    def get_subject(self, token: str) -> Optional[str]:
+        """
+        Return the `sub` claim of a valid token, verifying it only on a miss.
+        Raises whatever the verifier raises for invalid tokens.
+        """
+        if self.maxsize <= 0:
+            return self._verify(token).get("sub")
+
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        now = self.clock()
+        entry = self._entries.get(key)
+        if entry is not None:
+            subject, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return subject
+            del self._entries[key]
+
+        self.misses += 1
+        payload = self._verify(token)
+        subject = payload.get("sub")
+        expires_at = payload.get("exp")
+        # Tokens without a subject or an expiry are not worth remembering
+        if subject and isinstance(expires_at, (int, float)) and expires_at > now:
+            self._entries[key] = (subject, float(expires_at))
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return subject
+
+
+class JwksRefresher:
+    """
+    Keeps a `JwksTokenVerifier` in sync with the issuer's JWKS endpoint.
+
+    The key set is fetched every `interval` seconds and, at most once per
+    `min_interval`, as soon as a token with an unknown `kid` shows up. A
+    failed fetch keeps the last good key set. Tokens cached under a key that
+    was withdrawn are dropped from `cache`.
+    """
+
+    def __init__(
+        self,
+        verifier: JwksTokenVerifier,
+        url: str,
+        cache: Optional[VerifiedTokenCache] = None,
+        interval: float = settings.JWKS_REFRESH_SECONDS,
+        min_interval: float = 10.0,
+        timeout: float = 5.0,
+    ):
+        self.verifier = verifier
+        self.url = url
+        self.cache = cache
+        self.interval = interval
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.stats = {"refreshes": 0, "failures": 0, "keys": 0, "last_refresh": None}
+
+    def _fetch(self) -> dict:
+        with urllib.request.urlopen(self.url, timeout=self.timeout) as response:
+            return json.load(response)
+
+    async def refresh(self) -> None:
+        jwks = await asyncio.to_thread(self._fetch)
+        removed = self.verifier.set_keys(jwks)
+        if removed and self.cache is not None:
+            self.cache.clear()
+        self.stats["refreshes"] += 1
+        self.stats["keys"] = len(self.verifier.key_ids)
+        self.stats["last_refresh"] = time.time()
+
+    async def run(self) -> None:
+        """
+        Refresh until cancelled. The initial fetch is left to the caller.
+        """
+        last_refresh = time.monotonic()
+        while True:
+            self.verifier.unknown_kid.clear()
+            try:
+                await asyncio.wait_for(
+                    self.verifier.unknown_kid.wait(), timeout=self.interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            await asyncio.sleep(
+                max(0.0, self.min_interval - (time.monotonic() - last_refresh))
+            )
+            last_refresh = time.monotonic()
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.stats["failures"] += 1
+                logger.error(f"JWKS refresh failed: {exc}")
+
+
+def build_verifier() -> TokenVerifier:
+    if settings.JWT_ALGORITHM.startswith("HS"):
+        return JoseTokenVerifier(settings.JWT_SECRET, [settings.JWT_ALGORITHM])
+    return JwksTokenVerifier([settings.JWT_ALGORITHM])
+
+
+token_cache = VerifiedTokenCache(
+    verifier=build_verifier(),
+    maxsize=settings.JWT_CACHE_SIZE,
+)
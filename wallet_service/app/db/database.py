@@ -1,4 +1,6 @@
-from app.core.config import database_url
+from app.core.config import database_url, replica_database_url
+from app.core.metrics import instrument_engine
+from app.db.pool import engine_options
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -6,15 +8,40 @@ Base = declarative_base()
 
 engine = create_async_engine(
     database_url,
-    pool_pre_ping=True,
     echo=False,
+    **engine_options("primary"),
 )
 
+instrument_engine(engine, "primary")
+
 async_session = async_sessionmaker(
     engine,
     expire_on_commit=False,
 )
 
+# Optional read replica with its own pool, see app.db.replica
+replica_engine = (
+    create_async_engine(
+        replica_database_url,
+        echo=False,
+        **engine_options("replica"),
+    )
+    if replica_database_url
+    else None
+)
+
+if replica_engine is not None:
+    instrument_engine(replica_engine, "replica")
+
+replica_session = (
+    async_sessionmaker(
+        replica_engine,
+        expire_on_commit=False,
+    )
+    if replica_engine is not None
+    else None
+)
+
 
 async def get_db():
     async with async_session() as session:
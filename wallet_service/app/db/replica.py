@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, Optional
+
+from app.core.config import settings
+from app.db.database import async_session, replica_engine, replica_session
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(settings.PROJECT_NAME)
+
+# Zero when replay has caught up with everything received, so an idle primary
+# does not look like lag; NULL (unhealthy) if nothing was replayed yet, or if
+# the WAL receiver is not streaming: a replica cut off from the primary has
+# replayed all it received and would otherwise look caught up. `status` is
+# only visible with pg_read_all_stats; without it the receiver process
+# existing is all that is checked
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN NOT EXISTS (
+            SELECT FROM pg_stat_wal_receiver
+            WHERE coalesce(status, 'streaming') = 'streaming'
+        ) THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+    """)
+
+
+class ReplicaRouter:
+    """
+    Decides per request whether a read may be served by the replica.
+
+    Reads go to the primary when no replica is configured, when the last
+    health check failed or saw more than `max_lag` seconds of replay lag,
+    when the caller asked for strong consistency, or when the same user
+    wrote less than `read_your_writes` seconds ago on this process.
+    """
+
+    def __init__(
+        self,
+        primary: async_sessionmaker,
+        replica: Optional[async_sessionmaker],
+        replica_engine: Optional[AsyncEngine],
+        max_lag: float = settings.REPLICA_MAX_LAG_SECONDS,
+        read_your_writes: float = settings.READ_YOUR_WRITES_SECONDS,
+        max_tracked_writers: int = 100000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.replica_engine = replica_engine
+        self.max_lag = max_lag
+        self.read_your_writes = read_your_writes
+        self.max_tracked_writers = max_tracked_writers
+        self.clock = clock
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.stats = Counter()
+        self._recent_writers: OrderedDict[str, float] = OrderedDict()
+
+    def note_write(self, user_id: str) -> None:
+        if self.replica is None:
+            return
+        self._recent_writers[user_id] = self.clock() + self.read_your_writes
+        self._recent_writers.move_to_end(user_id)
+        if len(self._recent_writers) > self.max_tracked_writers:
+            self._recent_writers.popitem(last=False)
+
+    def _wrote_recently(self, user_id: str) -> bool:
+        until = self._recent_writers.get(user_id)
+        if until is None:
+            return False
+        if until > self.clock():
+            return True
+        del self._recent_writers[user_id]
+        return False
+
+    def use_replica(self, user_id: str, strong: bool = False) -> bool:
+        if self.replica is None:
+            return False
+        if not self.healthy:
+            self.stats["primary_unhealthy"] += 1
+            return False
+        if strong or self._wrote_recently(user_id):
+            self.stats["primary_read_your_writes"] += 1
+            return False
+        self.stats["replica"] += 1
+        return True
+
+    def session(self, user_id: str, strong: bool = False) -> AsyncSession:
+        if self.use_replica(user_id, strong):
+            return self.replica()
+        return self.primary()
+
+    async def check(self) -> None:
+        try:
+            async with self.replica_engine.connect() as conn:
+                lag = await conn.scalar(REPLICA_LAG_SQL)
+        except Exception as exc:
+            self.stats["health_check_failures"] += 1
+            if self.healthy:
+                logger.error(f"Read replica failed its health check: {exc}")
+            self.healthy, self.lag_seconds = False, None
+            return
+
+        self.lag_seconds = float(lag) if lag is not None else None
+        healthy = self.lag_seconds is not None and self.lag_seconds <= self.max_lag
+        if healthy != self.healthy:
+            logger.warning(
+                f"Read replica {'back in' if healthy else 'out of'} rotation, "
+                f"lag {self.lag_seconds} s"
+            )
+        self.healthy = healthy
+
+    async def run(self, interval: float = settings.REPLICA_HEALTH_CHECK_SECONDS):
+        while True:
+            await self.check()
+            await asyncio.sleep(interval)
+
+
+replica_router = ReplicaRouter(async_session, replica_session, replica_engine)
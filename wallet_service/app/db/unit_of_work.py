@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import random
+from collections import Counter
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from app.core.config import settings
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(settings.PROJECT_NAME)
+
+T = TypeVar("T")
+
+# serialization_failure, deadlock_detected, lock_not_available
+RETRYABLE_SQLSTATES = frozenset({"40001", "40P01", "55P03"})
+
+# Keys: "retry:<sqlstate>", "exhausted:<sqlstate>", "recovered"
+retry_stats: Counter = Counter()
+
+
+def retryable_sqlstate(exc: BaseException) -> Optional[str]:
+    """
+    SQLSTATE of a database error if re-running the transaction may succeed.
+    """
+    if not isinstance(exc, DBAPIError):
+        return None
+    orig = exc.orig
+    sqlstate = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    return sqlstate if sqlstate in RETRYABLE_SQLSTATES else None
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Full-jitter exponential backoff in seconds before retry number `attempt`.
+    """
+    cap = min(
+        settings.DB_RETRY_MAX_DELAY_MS,
+        settings.DB_RETRY_BASE_DELAY_MS * 2 ** (attempt - 1),
+    )
+    return random.uniform(0, cap) / 1000
+
+
+async def run_in_transaction(
+    db: AsyncSession, work: Callable[..., Awaitable[T]], *args
+) -> T:
+    """
+    Run `work(db, *args)` as one transaction, re-running it from scratch when
+    Postgres aborts it with a deadlock, serialization failure or lock timeout.
+
+    `work` must be safe to repeat: it owns the whole transaction including the
+    commit, and must not keep state across attempts. Any other error,
+    including HTTPException, is propagated unchanged.
+    """
+    attempt = 1
+    while True:
+        try:
+            result = await work(db, *args)
+        except DBAPIError as exc:
+            sqlstate = retryable_sqlstate(exc)
+            await db.rollback()
+            if sqlstate is None:
+                raise
+            if attempt >= settings.DB_RETRY_MAX_ATTEMPTS:
+                retry_stats[f"exhausted:{sqlstate}"] += 1
+                raise
+            retry_stats[f"retry:{sqlstate}"] += 1
+            logger.warning(
+                f"Retrying {work.__name__} after SQLSTATE {sqlstate} "
+                f"(attempt {attempt}/{settings.DB_RETRY_MAX_ATTEMPTS})"
+            )
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        if attempt > 1:
+            retry_stats["recovered"] += 1
+        return result
@@ -0,0 +1,42 @@
+"""
+Balance snapshot maintenance.
+
+Usage:
+    python -m app.jobs.balance_snapshots compact
+    python -m app.jobs.balance_snapshots check
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+from app.db.database import async_session, engine
+from app.services.balance_snapshots import compact_snapshots, find_balance_drift
+
+
+async def _run(command: str) -> int:
+    try:
+        async with async_session() as db:
+            if command == "compact":
+                written = await compact_snapshots(db)
+                print(json.dumps({"snapshots_written": written}))
+                return 0
+
+            drift = await find_balance_drift(db)
+            for row in drift:
+                print(json.dumps(row, default=str))
+            return 1 if drift else 0
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["compact", "check"])
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_run(args.command)))
+
+
+if __name__ == "__main__":
+    main()
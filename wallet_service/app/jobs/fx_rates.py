@@ -0,0 +1,95 @@
+"""
+FX rate table maintenance. Rates are the value of one unit of a currency in
+FX_BASE_CURRENCY; running services pick changes up on their next refresh.
+
+Usage:
+    python -m app.jobs.fx_rates show
+    python -m app.jobs.fx_rates load rates.json [--replace]
+
+`rates.json` maps currency codes to rates: {"USD": "92.5", "EUR": "100.1"}.
+`--replace` also deletes currencies missing from the file.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.db.database import async_session, engine
+from app.models.fx_rate import FxRate
+from app.services.fx_rates import FxRateCache, read_rates_file
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+
+async def _show() -> dict:
+    async with async_session() as db:
+        result = await db.execute(select(FxRate).order_by(FxRate.currency))
+        return {
+            rate.currency: {
+                "rate": str(rate.rate),
+                "updated_at": rate.updated_at.isoformat(),
+            }
+            for rate in result.scalars()
+        }
+
+
+async def _load(path: str, replace: bool) -> dict:
+    # Same checks the services apply when they pick the rates up
+    rates = dict(FxRateCache().publish(read_rates_file(path)).rates)
+    now = datetime.now(timezone.utc)
+    async with async_session() as db:
+        statement = insert(FxRate).values(
+            [
+                {"currency": currency, "rate": rate, "updated_at": now}
+                for currency, rate in rates.items()
+            ]
+        )
+        await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[FxRate.currency],
+                set_={"rate": statement.excluded.rate, "updated_at": now},
+            )
+        )
+        deleted = 0
+        if replace:
+            result = await db.execute(
+                delete(FxRate).where(FxRate.currency.not_in(list(rates)))
+            )
+            deleted = result.rowcount
+        await db.commit()
+    return {"loaded": len(rates), "deleted": deleted}
+
+
+async def _run(command: str, path: Optional[str], replace: bool) -> int:
+    try:
+        if command == "show":
+            report = await _show()
+        else:
+            report = await _load(path, replace)
+    except (OSError, ValueError) as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    finally:
+        await engine.dispose()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("command", choices=["show", "load"])
+    parser.add_argument("path", nargs="?", help="JSON file with rates, for load")
+    parser.add_argument("--replace", action="store_true")
+    args = parser.parse_args()
+    if args.command == "load" and not args.path:
+        parser.error("load needs a path")
+    sys.exit(asyncio.run(_run(args.command, args.path, args.replace)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Hot account mode management.
+
+Usage:
+    python -m app.jobs.hot_accounts enable <account_id> --buckets 16
+    python -m app.jobs.hot_accounts disable <account_id>
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import uuid
+
+from app.db.database import async_session, engine
+from app.services.hot_accounts import disable_hot_mode, enable_hot_mode
+from fastapi import HTTPException
+
+
+async def _run(command: str, account_id: uuid.UUID, buckets: int) -> int:
+    try:
+        async with async_session() as db:
+            if command == "enable":
+                account = await enable_hot_mode(db, account_id, buckets)
+            else:
+                account = await disable_hot_mode(db, account_id)
+    except HTTPException as exc:
+        print(exc.detail, file=sys.stderr)
+        return 1
+    finally:
+        await engine.dispose()
+
+    print(
+        json.dumps(
+            {"account_id": str(account.id), "balance_buckets": account.balance_buckets}
+        )
+    )
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["enable", "disable"])
+    parser.add_argument("account_id", type=uuid.UUID)
+    parser.add_argument("--buckets", type=int, default=16)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(_run(args.command, args.account_id, args.buckets)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Idempotency store retention sweep.
+
+Usage:
+    python -m app.jobs.idempotency sweep
+"""
+
+import argparse
+import asyncio
+import json
+
+from app.db.database import async_session, engine
+from app.services.idempotency import sweep_idempotency_records
+
+
+async def _run() -> None:
+    try:
+        async with async_session() as db:
+            deleted = await sweep_idempotency_records(db)
+        print(json.dumps({"deleted": deleted}))
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["sweep"])
+    parser.parse_args()
+    asyncio.run(_run())
+
+
+if __name__ == "__main__":
+    main()
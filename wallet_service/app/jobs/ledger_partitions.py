@@ -0,0 +1,66 @@
+"""
+Ledger partition maintenance.
+
+`create` adds monthly partitions up to LEDGER_PARTITIONS_AHEAD months ahead.
+`archive` detaches partitions older than LEDGER_HOT_MONTHS, writes each to
+LEDGER_ARCHIVE_DIR as gzipped CSV and drops it; run `balance_snapshots
+compact` first so snapshots cover the archived rows. `prune-keys` deletes
+ledger idempotency keys older than LEDGER_KEY_RETENTION_DAYS.
+
+Usage:
+    python -m app.jobs.ledger_partitions list
+    python -m app.jobs.ledger_partitions create [--ahead N]
+    python -m app.jobs.ledger_partitions archive [--keep-months N] [--dir PATH] [--dry-run]
+    python -m app.jobs.ledger_partitions prune-keys
+"""
+
+import argparse
+import asyncio
+import json
+
+from app.core.config import settings
+from app.db.database import engine
+from app.services.ledger_partitions import (
+    archive_partitions,
+    create_partitions,
+    list_partitions,
+    prune_transaction_keys,
+)
+
+
+async def _run(args: argparse.Namespace) -> None:
+    try:
+        async with engine.connect() as conn:
+            # DETACH ... CONCURRENTLY can't run inside a transaction block
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            if args.command == "list":
+                for partition in await list_partitions(conn):
+                    print(json.dumps(partition))
+            elif args.command == "create":
+                print(
+                    json.dumps({"created": await create_partitions(conn, args.ahead)})
+                )
+            elif args.command == "archive":
+                for result in await archive_partitions(
+                    conn, args.keep_months, args.dir, dry_run=args.dry_run
+                ):
+                    print(json.dumps(result))
+            else:
+                print(json.dumps({"keys_deleted": await prune_transaction_keys(conn)}))
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["list", "create", "archive", "prune-keys"])
+    parser.add_argument("--ahead", type=int, default=settings.LEDGER_PARTITIONS_AHEAD)
+    parser.add_argument("--keep-months", type=int, default=settings.LEDGER_HOT_MONTHS)
+    parser.add_argument("--dir", default=settings.LEDGER_ARCHIVE_DIR)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Outbox relay worker.
+
+Usage:
+    python -m app.jobs.outbox_relay --sink stdout
+    python -m app.jobs.outbox_relay --sink file --path events.ndjson
+"""
+
+import argparse
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.db.database import engine
+from app.services.outbox import OutboxRelay, build_sink
+
+logger = logging.getLogger(settings.PROJECT_NAME)
+
+
+async def _report(relay: OutboxRelay, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        logger.info(f"Outbox relay stats: {relay.stats}")
+
+
+async def _run(args: argparse.Namespace) -> None:
+    relay = OutboxRelay(build_sink(args.sink, args.path), batch_size=args.batch_size)
+    reporter = asyncio.create_task(_report(relay, args.stats_interval))
+    try:
+        await relay.run()
+    finally:
+        reporter.cancel()
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sink", choices=["stdout", "file"], default="stdout")
+    parser.add_argument("--path", default=settings.OUTBOX_FILE_PATH)
+    parser.add_argument("--batch-size", type=int, default=settings.OUTBOX_BATCH_SIZE)
+    parser.add_argument("--stats-interval", type=float, default=30.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Ledger reconciliation: compares every account balance with its ledger,
+range of account ids by range, and writes the accounts that differ to an
+NDJSON report.
+
+Usage:
+    python -m app.jobs.reconcile [--chunks 256] [--concurrency 4]
+        [--throttle 1.0] [--replica] [--resume] [--full-ledger]
+
+Progress is checkpointed after every range; `--resume` skips the ranges an
+interrupted run already finished and appends to its report. `--throttle N`
+rests N times as long as each range took before the next one, so the job
+uses at most 1 / (1 + N) of each connection's time.
+
+Exits 1 if discrepancies were found, 2 if some ranges failed.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from app.db.database import async_session, engine, replica_engine, replica_session
+from app.services.reconciliation import Checkpoint, reconcile
+
+
+async def _run(args: argparse.Namespace) -> int:
+    checkpoint = Checkpoint(args.checkpoint, args.chunks, args.full_ledger)
+    try:
+        if args.resume:
+            checkpoint.load()
+        elif os.path.exists(args.checkpoint):
+            os.remove(args.checkpoint)
+    except (OSError, ValueError) as exc:
+        print(exc, file=sys.stderr)
+        return 2
+
+    if args.replica and replica_session is None:
+        print("--replica needs POSTGRES_REPLICA_HOST", file=sys.stderr)
+        return 2
+    sessionmaker = replica_session if args.replica else async_session
+    try:
+        with open(args.report, "a" if args.resume else "w") as report:
+            summary = await reconcile(
+                sessionmaker,
+                report,
+                checkpoint,
+                concurrency=args.concurrency,
+                throttle=args.throttle,
+                statement_timeout_ms=int(args.statement_timeout * 1000),
+            )
+    finally:
+        await engine.dispose()
+        if replica_engine is not None:
+            await replica_engine.dispose()
+
+    print(json.dumps({**summary, "report": args.report}))
+    if summary["failed"]:
+        return 2
+    return 1 if summary["discrepancies"] else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--chunks", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--throttle", type=float, default=0.0)
+    parser.add_argument(
+        "--statement-timeout", type=float, default=60.0, help="seconds per range"
+    )
+    parser.add_argument("--report", default="reconciliation.ndjson")
+    parser.add_argument("--checkpoint", default="reconciliation.checkpoint.json")
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument(
+        "--full-ledger",
+        action="store_true",
+        help="sum the whole ledger instead of snapshot + tail",
+    )
+    parser.add_argument("--replica", action="store_true")
+    args = parser.parse_args()
+    if args.chunks < 1 or args.concurrency < 1 or args.throttle < 0:
+        parser.error("--chunks and --concurrency must be positive, --throttle >= 0")
+    sys.exit(asyncio.run(_run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,76 @@
+import asyncio
+import contextlib
 import logging
+from contextlib import asynccontextmanager
 
-from app.api.v1 import wallet
+from app.api.v1 import metrics, wallet
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware
+from app.core.responses import ORJSONResponse
+from app.core.security import JwksRefresher, JwksTokenVerifier, token_cache
+from app.db.replica import replica_router
+from app.db.unit_of_work import retryable_sqlstate
+from app.services.balance_snapshots import run_snapshot_worker
+from app.services.fx_rates import fx_rates
+from app.services.ledger_partitions import ensure_partitions, run_partition_worker
+from app.services.outbox import OutboxRelay, build_sink
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import SQLAlchemyError
 
-app = FastAPI(title=settings.PROJECT_NAME)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background = []
+    await ensure_partitions()
+    if settings.LEDGER_PARTITION_CHECK_SECONDS > 0:
+        background.append(
+            asyncio.create_task(
+                run_partition_worker(settings.LEDGER_PARTITION_CHECK_SECONDS)
+            )
+        )
+    try:
+        await fx_rates.refresh()
+    except Exception as exc:
+        # Serve anyway, only the base currency is available until a refresh
+        logger.error(f"Initial FX rates load failed: {exc}")
+    if fx_rates.interval > 0:
+        background.append(asyncio.create_task(fx_rates.run()))
+    if isinstance(token_cache.verifier, JwksTokenVerifier):
+        refresher = JwksRefresher(token_cache.verifier, settings.JWKS_URL, token_cache)
+        try:
+            await refresher.refresh()
+        except Exception as exc:
+            # Serve anyway, the first token with an unknown kid triggers a retry
+            logger.error(f"Initial JWKS fetch failed: {exc}")
+        background.append(asyncio.create_task(refresher.run()))
+    if replica_router.replica is not None:
+        # Reads stay on the primary until the first check passes
+        background.append(asyncio.create_task(replica_router.run()))
+    if settings.BALANCE_SNAPSHOT_INTERVAL_SECONDS > 0:
+        background.append(
+            asyncio.create_task(
+                run_snapshot_worker(settings.BALANCE_SNAPSHOT_INTERVAL_SECONDS)
+            )
+        )
+    if settings.OUTBOX_SINK:
+        relay = OutboxRelay(build_sink(settings.OUTBOX_SINK, settings.OUTBOX_FILE_PATH))
+        background.append(asyncio.create_task(relay.run()))
+    yield
+    for task in background:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+
+app = FastAPI(
+    title=settings.PROJECT_NAME,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 app.include_router(wallet.router)
+app.include_router(metrics.router)
+app.add_middleware(MetricsMiddleware)
 
 logger = logging.getLogger(settings.PROJECT_NAME)
 
@@ -19,6 +82,13 @@ async def sqlalchemy_exception_handler(request: Request, exc: SQLAlchemyError):
     Позволяет не "светить" внутренности базы наружу, но логировать ошибку.
     """
     logger.error(f"Database error: {exc}")
+    if retryable_sqlstate(exc):
+        # Concurrency conflict that outlived the in-process retries
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Service is busy. Please retry the request."},
+            headers={"Retry-After": "1"},
+        )
     return JSONResponse(
         status_code=500,
         content={"detail": "Internal database error. Please try again later."},
@@ -3,7 +3,7 @@ from datetime import datetime, timezone
 from decimal import Decimal
 
 from app.db.database import Base
-from sqlalchemy import UUID, DateTime, Numeric, String
+from sqlalchemy import UUID, DateTime, Numeric, SmallInteger, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 
@@ -19,6 +19,11 @@ class Account(Base):
     balance: Mapped[Decimal] = mapped_column(
         Numeric(18, 4), default=Decimal("0.0000"), nullable=False
     )
+    # Number of sub-balance buckets, 0 for a regular account
+    balance_buckets: Mapped[int] = mapped_column(
+        SmallInteger, default=0, server_default="0", nullable=False
+    )
+    # Fixed at creation; cached per account, see AccountCache.currencies
     currency: Mapped[str] = mapped_column(String(3), default="RUB", nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
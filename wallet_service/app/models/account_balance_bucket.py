@@ -0,0 +1,24 @@
+import uuid
+from decimal import Decimal
+
+from app.db.database import Base
+from sqlalchemy import UUID, ForeignKey, Numeric, SmallInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class AccountBalanceBucket(Base):
+    """
+    Sub-balance of a hot account. Credits land in a random bucket so they
+    don't queue on the account row; the account's total balance is
+    `Account.balance` plus the sum of its buckets.
+    """
+
+    __tablename__ = "account_balance_buckets"
+
+    account_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("accounts.id"), primary_key=True
+    )
+    bucket: Mapped[int] = mapped_column(SmallInteger, primary_key=True)
+    balance: Mapped[Decimal] = mapped_column(
+        Numeric(18, 4), default=Decimal("0.0000"), nullable=False
+    )
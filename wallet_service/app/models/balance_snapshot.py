@@ -0,0 +1,42 @@
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app.db.database import Base
+from sqlalchemy import UUID, DateTime, ForeignKey, Index, Numeric, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class BalanceSnapshot(Base):
+    """
+    Ledger balance of an account as of `taken_at`: the sum of all
+    transactions with `created_at <= taken_at`.
+    """
+
+    __tablename__ = "balance_snapshots"
+    __table_args__ = (
+        Index(
+            "ix_balance_snapshots_account_id_taken_at",
+            "account_id",
+            "taken_at",
+            unique=True,
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+        server_default=func.gen_random_uuid(),
+    )
+    account_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("accounts.id"), nullable=False
+    )
+    balance: Mapped[Decimal] = mapped_column(Numeric(18, 4), nullable=False)
+    taken_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
+        nullable=False,
+    )
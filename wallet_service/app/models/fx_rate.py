@@ -0,0 +1,25 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from app.db.database import Base
+from sqlalchemy import CheckConstraint, DateTime, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class FxRate(Base):
+    """
+    Value of one unit of `currency` in FX_BASE_CURRENCY. Read into the
+    in-process cache, never on the transfer path.
+    """
+
+    __tablename__ = "fx_rates"
+    __table_args__ = (CheckConstraint("rate > 0", name="ck_fx_rates_rate_positive"),)
+
+    currency: Mapped[str] = mapped_column(String(3), primary_key=True)
+    rate: Mapped[Decimal] = mapped_column(Numeric(18, 8), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
@@ -0,0 +1,35 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.db.database import Base
+from sqlalchemy import UUID, DateTime, SmallInteger, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class IdempotencyRecord(Base):
+    """
+    Outcome of a money request, keyed by its client idempotency key.
+
+    A row is claimed (`IN_PROGRESS`) before any account is locked and
+    completed with the original response once the ledger commit succeeded.
+    """
+
+    __tablename__ = "idempotency_records"
+
+    key: Mapped[str] = mapped_column(String(128), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status: Mapped[str] = mapped_column(
+        String(16), nullable=False
+    )  # IN_PROGRESS, COMPLETED
+    response_status: Mapped[Optional[int]] = mapped_column(SmallInteger)
+    response_body: Mapped[Optional[dict]] = mapped_column(JSONB)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True,
+    )
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
@@ -0,0 +1,27 @@
+import uuid
+from datetime import datetime, timezone
+
+from app.db.database import Base
+from sqlalchemy import UUID, BigInteger, DateTime, Identity, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class OutboxEvent(Base):
+    """
+    Ledger change waiting to be published, written in the same transaction
+    as the `Transaction` row it describes. The relay deletes rows once the
+    sink has accepted them.
+    """
+
+    __tablename__ = "outbox_events"
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    account_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    event_type: Mapped[str] = mapped_column(String, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
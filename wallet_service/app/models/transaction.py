@@ -1,21 +1,34 @@
 import uuid
 from datetime import datetime, timezone
 from decimal import Decimal
+from typing import Optional
 
 from app.db.database import Base
-from sqlalchemy import UUID, DateTime, ForeignKey, Numeric, String
+from sqlalchemy import UUID, DateTime, ForeignKey, Index, Numeric, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Serves keyset pagination of an account's history; the included
+        # columns let activity aggregation run as an index-only scan
+        Index(
+            "ix_transactions_account_id_created_at_id",
+            "account_id",
+            "created_at",
+            "id",
+            postgresql_include=["type", "amount"],
+        ),
+        # Monthly range partitions, see app.services.ledger_partitions
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
-    idempotency_key: Mapped[str] = mapped_column(
-        String, unique=True, index=True, nullable=False
-    )
+    # Unique through transaction_keys, a partitioned table can't enforce it
+    idempotency_key: Mapped[str] = mapped_column(String, nullable=False)
     account_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("accounts.id"), nullable=False
     )
@@ -23,6 +36,12 @@ class Transaction(Base):
     type: Mapped[str] = mapped_column(
         String, nullable=False
     )  # DEPOSIT, WITHDRAW, TRANSFER_OUT, TRANSFER_IN
+    # Rate a cross-currency transfer was converted at (units of the receiving
+    # currency per unit of the sending one), NULL when nothing was converted
+    fx_rate: Mapped[Optional[Decimal]] = mapped_column(Numeric(18, 8), nullable=True)
+    # Partition key, hence part of the primary key
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+        DateTime(timezone=True),
+        primary_key=True,
+        default=lambda: datetime.now(timezone.utc),
     )
@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from app.db.database import Base
+from sqlalchemy import DateTime, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class TransactionKey(Base):
+    """
+    Idempotency key of a ledger row. The partitioned `transactions` table
+    cannot enforce a unique key across partitions, so a trigger on it claims
+    every key here; keys older than LEDGER_KEY_RETENTION_DAYS are pruned.
+    """
+
+    __tablename__ = "transaction_keys"
+
+    idempotency_key: Mapped[str] = mapped_column(String, primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, index=True
+    )
@@ -1,7 +1,8 @@
 from datetime import datetime
 from decimal import Decimal
+from typing import Annotated, List, Optional
 
-from pydantic import UUID4, BaseModel, Field
+from pydantic import UUID4, BaseModel, Field, PlainSerializer
 
 
 class TransferRequest(BaseModel):
@@ -21,6 +22,11 @@ class DepositRequest(BaseModel):
     )
 
 
+class AccountCreateRequest(BaseModel):
+    # FX_BASE_CURRENCY if not given
+    currency: Optional[str] = Field(default=None, pattern=r"^[A-Z]{3}$")
+
+
 class AccountResponse(BaseModel):
     id: UUID4
     user_id: UUID4
@@ -39,12 +45,60 @@ class WithdrawRequest(BaseModel):
     )
 
 
+class OperationResponse(BaseModel):
+    status: str
+    # A JSON number, as these responses have always been sent and as
+    # idempotency replays store them
+    new_balance: Annotated[
+        Decimal, PlainSerializer(float, return_type=float, when_used="json")
+    ]
+
+
 class TransactionResponse(BaseModel):
     id: UUID4
     account_id: UUID4
     amount: Decimal
     type: str
+    fx_rate: Optional[Decimal] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class BatchTransferRequest(BaseModel):
+    transfers: List[TransferRequest] = Field(min_length=1, max_length=1000)
+
+
+class BatchTransferItemResult(BaseModel):
+    idempotency_key: str
+    status_code: int
+    detail: str
+    new_balance: Optional[Decimal] = None
+
+
+class BatchTransferResponse(BaseModel):
+    results: List[BatchTransferItemResult]
+
+
+class BalanceAtResponse(BaseModel):
+    account_id: UUID4
+    balance: Decimal
+    at: datetime
+
+
+class ActivityBucket(BaseModel):
+    period_start: datetime
+    type: str
+    inflow: Decimal
+    outflow: Decimal
+    net: Decimal
+    count: int
+
+
+class AccountActivityResponse(BaseModel):
+    account_id: UUID4
+    bucket: str
+    since: datetime
+    until: datetime
+    buckets: List[ActivityBucket]
@@ -0,0 +1,174 @@
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Protocol, Tuple
+
+from app.core.config import settings
+from app.models.account import Account
+from app.services.hot_accounts import buckets_total
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class CacheBackend(Protocol):
+    """
+    Key-value store behind `AccountCache`. The in-process LRU is the default;
+    a shared store (e.g. Redis) makes invalidations visible to every node.
+    """
+
+    async def get(self, key: str) -> Optional[Any]: ...
+
+    async def set(self, key: str, value: Any, ttl: Optional[float]) -> None: ...
+
+    async def delete(self, *keys: str) -> None: ...
+
+
+class LocalLRUBackend:
+    """
+    Bounded LRU of this process. Entries without a ttl live until evicted.
+    """
+
+    def __init__(
+        self, maxsize: int = 100000, clock: Callable[[], float] = time.monotonic
+    ):
+        self.maxsize = maxsize
+        self.clock = clock
+        self._entries: OrderedDict[str, Tuple[Any, Optional[float]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= self.clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        expires_at = self.clock() + ttl if ttl is not None else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+
+def _accounts_key(user_id: Any) -> str:
+    return f"accounts:{uuid.UUID(str(user_id))}"
+
+
+class AccountCache:
+    """
+    Account owners and per-user account lists for the read endpoints, and
+    account currencies for transfers.
+
+    Ownership and currency never change, so those entries are only evicted
+    by the LRU.
+    Account lists carry balances: they expire after `list_ttl` seconds and
+    are dropped as soon as a wallet operation on this node (or any node,
+    with a shared backend) changes one of the user's balances.
+    """
+
+    def __init__(self, backend: CacheBackend, list_ttl: float):
+        self.backend = backend
+        self.list_ttl = list_ttl
+        self.stats = Counter()
+
+    async def owner(
+        self, db: AsyncSession, account_id: uuid.UUID
+    ) -> Optional[uuid.UUID]:
+        key = f"owner:{account_id}"
+        cached = await self.backend.get(key)
+        if cached is not None:
+            self.stats["owner_hit"] += 1
+            return cached
+
+        self.stats["owner_miss"] += 1
+        user_id = await db.scalar(
+            select(Account.user_id).where(Account.id == account_id)
+        )
+        # Unknown ids are not cached, the account may be created right after
+        if user_id is not None:
+            await self.backend.set(key, user_id, None)
+        return user_id
+
+    async def is_owner(
+        self, db: AsyncSession, account_id: uuid.UUID, user_id: str
+    ) -> bool:
+        return await self.owner(db, account_id) == uuid.UUID(str(user_id))
+
+    async def currencies(
+        self, db: AsyncSession, account_ids: Iterable[uuid.UUID]
+    ) -> Dict[str, str]:
+        """
+        Currency of each account by id; unknown accounts are left out. An
+        account's currency never changes, so entries have no ttl.
+        """
+        found = {}
+        missing = []
+        for account_id in account_ids:
+            cached = await self.backend.get(f"currency:{account_id}")
+            if cached is not None:
+                self.stats["currency_hit"] += 1
+                found[str(account_id)] = cached
+            else:
+                self.stats["currency_miss"] += 1
+                missing.append(account_id)
+        if missing:
+            result = await db.execute(
+                select(Account.id, Account.currency).where(Account.id.in_(missing))
+            )
+            for row in result:
+                await self.backend.set(f"currency:{row.id}", row.currency, None)
+                found[str(row.id)] = row.currency
+        return found
+
+    async def accounts(self, db: AsyncSession, user_id: str) -> List[dict]:
+        key = _accounts_key(user_id)
+        if self.list_ttl > 0:
+            cached = await self.backend.get(key)
+            if cached is not None:
+                self.stats["accounts_hit"] += 1
+                return cached
+
+        self.stats["accounts_miss"] += 1
+        result = await db.execute(
+            select(
+                Account.id,
+                Account.user_id,
+                (Account.balance + buckets_total()).label("balance"),
+                Account.currency,
+            ).where(Account.user_id == uuid.UUID(str(user_id)))
+        )
+        accounts = [dict(row._mapping) for row in result]
+        for account in accounts:
+            await self.backend.set(f"owner:{account['id']}", account["user_id"], None)
+            await self.backend.set(
+                f"currency:{account['id']}", account["currency"], None
+            )
+        if self.list_ttl > 0:
+            await self.backend.set(key, accounts, self.list_ttl)
+        return accounts
+
+    async def invalidate_balances(self, user_ids: Iterable[Any]) -> None:
+        """
+        Call after a commit that changed balances or added accounts.
+        """
+        keys = {_accounts_key(user_id) for user_id in user_ids}
+        if keys:
+            self.stats["invalidations"] += len(keys)
+            await self.backend.delete(*keys)
+
+
+account_cache = AccountCache(
+    backend=LocalLRUBackend(maxsize=settings.ACCOUNT_CACHE_SIZE),
+    list_ttl=settings.ACCOUNT_LIST_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,60 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+from app.models.transaction import Transaction
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Longest calendar length of each bucket, used to bound the requested range
+BUCKET_LENGTHS = {
+    "day": timedelta(days=1),
+    "week": timedelta(days=7),
+    "month": timedelta(days=31),
+}
+
+
+def bucket_count(bucket: str, since: datetime, until: datetime) -> int:
+    """
+    Upper estimate of the buckets between `since` and `until`.
+    """
+    return int((until - since) / BUCKET_LENGTHS[bucket]) + 1
+
+
+async def account_activity(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    bucket: str,
+    since: datetime,
+    until: datetime,
+) -> List[dict]:
+    """
+    Inflow, outflow, net and count of an account's ledger per time bucket
+    (UTC) and transaction type, for `since <= created_at < until`.
+
+    Runs as one aggregate over an index-only scan of the history index, the
+    rows never leave the database.
+    """
+    period_start = func.date_trunc(bucket, Transaction.created_at, "UTC")
+    result = await db.execute(
+        select(
+            period_start.label("period_start"),
+            Transaction.type,
+            func.coalesce(
+                func.sum(Transaction.amount).filter(Transaction.amount > 0), 0
+            ).label("inflow"),
+            func.coalesce(
+                func.sum(-Transaction.amount).filter(Transaction.amount < 0), 0
+            ).label("outflow"),
+            func.sum(Transaction.amount).label("net"),
+            func.count().label("count"),
+        )
+        .where(
+            Transaction.account_id == account_id,
+            Transaction.created_at >= since,
+            Transaction.created_at < until,
+        )
+        .group_by(period_start, Transaction.type)
+        .order_by(period_start, Transaction.type)
+    )
+    return [dict(row._mapping) for row in result]
@@ -0,0 +1,320 @@
+import json
+import uuid
+from collections import Counter
+from typing import Dict, List
+
+from app.core.config import settings
+from app.schemas.schemas import DepositRequest, TransferRequest, WithdrawRequest
+from app.services import wallet_operations
+from app.services.account_cache import account_cache
+from app.services.fx_rates import fx_rates
+from app.services.idempotency import record_response
+from app.services.outbox import (
+    LEDGER_ENTRY_RECORDED,
+    ledger_entry_values,
+    ledger_event_values,
+)
+from fastapi import HTTPException
+from sqlalchemy import Row, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Keys: "<operation>:fast", "<operation>:fallback"
+atomic_update_stats: Counter = Counter()
+
+# Ledger rows and their outbox events, written only if `moved` changed a
+# balance. Entries arrive as parallel arrays and keep their order
+_LEDGER_CTES = """
+    entries AS (
+        SELECT *
+        FROM unnest(
+            CAST(:entry_ids AS uuid[]),
+            CAST(:entry_account_ids AS uuid[]),
+            CAST(:entry_amounts AS numeric[]),
+            CAST(:entry_types AS text[]),
+            CAST(:entry_keys AS text[]),
+            CAST(:entry_fx_rates AS numeric[]),
+            CAST(:entry_payloads AS jsonb[]),
+            CAST(:entry_created_at AS timestamptz[])
+        ) WITH ORDINALITY AS entry(
+            id, account_id, amount, type, idempotency_key, fx_rate, payload,
+            created_at, ordinal
+        )
+    ),
+    ledger AS (
+        INSERT INTO transactions
+            (id, account_id, amount, type, idempotency_key, fx_rate, created_at)
+        SELECT id, account_id, amount, type, idempotency_key, fx_rate, created_at
+        FROM entries
+        WHERE EXISTS (SELECT FROM moved)
+        ORDER BY ordinal
+    ),
+    outbox AS (
+        INSERT INTO outbox_events (account_id, event_type, payload, created_at)
+        SELECT account_id, CAST(:event_type AS text), payload, created_at
+        FROM entries
+        WHERE EXISTS (SELECT FROM moved)
+        ORDER BY ordinal
+    )
+"""
+
+# The locking CTE reads the current row versions, so whatever it returns
+# explains exactly why `moved` did or did not change a balance
+_RESULT = """
+    SELECT locked.id, locked.user_id, locked.balance_buckets,
+           moved.balance AS new_balance
+    FROM locked LEFT JOIN moved ON moved.id = locked.id
+"""
+
+# Hot accounts are skipped and left to the ORM path
+DEPOSIT_SQL = text(f"""
+    WITH locked AS MATERIALIZED (
+        SELECT id, user_id, balance_buckets
+        FROM accounts
+        WHERE id = :account_id AND balance_buckets = 0
+        FOR NO KEY UPDATE
+    ),
+    moved AS (
+        UPDATE accounts AS a
+        SET balance = a.balance + :amount, updated_at = now()
+        FROM locked
+        WHERE a.id = locked.id AND locked.user_id = :user_id
+        RETURNING a.id, a.balance
+    ),
+    {_LEDGER_CTES}
+    {_RESULT}
+    """)
+
+WITHDRAW_SQL = text(f"""
+    WITH locked AS MATERIALIZED (
+        SELECT id, user_id, balance, balance_buckets
+        FROM accounts
+        WHERE id = :account_id
+        FOR NO KEY UPDATE
+    ),
+    moved AS (
+        UPDATE accounts AS a
+        SET balance = a.balance - :amount, updated_at = now()
+        FROM locked
+        WHERE a.id = locked.id
+          AND locked.user_id = :user_id
+          AND locked.balance_buckets = 0
+          AND locked.balance >= :amount
+        RETURNING a.id, a.balance
+    ),
+    {_LEDGER_CTES}
+    {_RESULT}
+    """)
+
+# Rows are locked in id order like the ORM path; a hot receiver is not locked.
+# The receiver is credited `:credit_amount`, `:amount` converted to its
+# currency
+TRANSFER_SQL = text(f"""
+    WITH locked AS MATERIALIZED (
+        SELECT id, user_id, balance, balance_buckets
+        FROM accounts
+        WHERE id IN (:from_account_id, :to_account_id)
+          AND (id = :from_account_id OR balance_buckets = 0)
+        ORDER BY id
+        FOR NO KEY UPDATE
+    ),
+    allowed AS (
+        SELECT
+        FROM locked AS sender JOIN locked AS receiver
+            ON receiver.id = :to_account_id
+        WHERE sender.id = :from_account_id
+          AND sender.user_id = :user_id
+          AND sender.balance_buckets = 0
+          AND sender.balance >= :amount
+    ),
+    moved AS (
+        UPDATE accounts AS a
+        SET balance = CASE WHEN a.id = :from_account_id
+                           THEN a.balance - :amount
+                           ELSE a.balance + :credit_amount END,
+            updated_at = now()
+        FROM allowed
+        WHERE a.id IN (:from_account_id, :to_account_id)
+        RETURNING a.id, a.balance
+    ),
+    {_LEDGER_CTES}
+    {_RESULT}
+    """)
+
+
+def _entry_params(entries: List[dict]) -> dict:
+    events = [ledger_event_values(entry) for entry in entries]
+    return {
+        "entry_ids": [entry["id"] for entry in entries],
+        "entry_account_ids": [entry["account_id"] for entry in entries],
+        "entry_amounts": [entry["amount"] for entry in entries],
+        "entry_types": [entry["type"] for entry in entries],
+        "entry_keys": [entry["idempotency_key"] for entry in entries],
+        "entry_fx_rates": [entry["fx_rate"] for entry in entries],
+        "entry_payloads": [json.dumps(event["payload"]) for event in events],
+        "entry_created_at": [entry["created_at"] for entry in entries],
+        "event_type": LEDGER_ENTRY_RECORDED,
+    }
+
+
+async def _execute(
+    db: AsyncSession, statement, params: dict, entries: List[dict]
+) -> Dict[str, Row]:
+    """
+    Run one fast-path statement. Returns the locked account rows by id.
+    """
+    try:
+        result = await db.execute(statement, {**params, **_entry_params(entries)})
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Transaction already processed")
+    return {str(row.id): row for row in result}
+
+
+async def deposit(db: AsyncSession, req: DepositRequest, user_id: str) -> dict:
+    """
+    Credit a regular account, write the ledger row and its outbox event in a
+    single statement. Hot and unknown accounts go through the ORM path.
+    """
+    if not settings.ATOMIC_BALANCE_UPDATES:
+        return await wallet_operations.deposit(db, req, user_id)
+
+    entry = ledger_entry_values(
+        req.account_id, req.amount, "DEPOSIT", req.idempotency_key
+    )
+    rows = await _execute(
+        db,
+        DEPOSIT_SQL,
+        {
+            "account_id": req.account_id,
+            "amount": req.amount,
+            "user_id": uuid.UUID(user_id),
+        },
+        [entry],
+    )
+    account = rows.get(str(req.account_id))
+    if account is None:
+        atomic_update_stats["deposit:fallback"] += 1
+        return await wallet_operations.deposit(db, req, user_id)
+    if str(account.user_id) != str(user_id):
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    result = {"status": "success", "new_balance": account.new_balance}
+    await record_response(db, req.idempotency_key, result)
+    await db.commit()
+    atomic_update_stats["deposit:fast"] += 1
+    await account_cache.invalidate_balances([account.user_id])
+    return result
+
+
+async def transfer(db: AsyncSession, req: TransferRequest, user_id: str) -> dict:
+    """
+    Move funds between two regular accounts in a single statement,
+    converting between their currencies with the cached rates. Hot accounts,
+    a missing receiver and amounts that can't be converted go through the
+    ORM path.
+    """
+    if not settings.ATOMIC_BALANCE_UPDATES or req.from_account_id == req.to_account_id:
+        return await wallet_operations.transfer(db, req, user_id)
+
+    currencies = await account_cache.currencies(
+        db, [req.from_account_id, req.to_account_id]
+    )
+    try:
+        credit_amount, fx_rate = fx_rates.current.convert(
+            req.amount,
+            currencies[str(req.from_account_id)],
+            currencies[str(req.to_account_id)],
+        )
+    except (KeyError, HTTPException):
+        # The ORM path reports it after the ownership checks
+        atomic_update_stats["transfer:fallback"] += 1
+        return await wallet_operations.transfer(db, req, user_id)
+
+    entries = [
+        ledger_entry_values(
+            req.from_account_id,
+            -req.amount,
+            "TRANSFER_OUT",
+            req.idempotency_key,
+            fx_rate,
+        ),
+        ledger_entry_values(
+            req.to_account_id,
+            credit_amount,
+            "TRANSFER_IN",
+            f"__internal__:tx:{req.idempotency_key}:in",
+            fx_rate,
+        ),
+    ]
+    rows = await _execute(
+        db,
+        TRANSFER_SQL,
+        {
+            "from_account_id": req.from_account_id,
+            "to_account_id": req.to_account_id,
+            "amount": req.amount,
+            "credit_amount": credit_amount,
+            "user_id": uuid.UUID(user_id),
+        },
+        entries,
+    )
+    sender = rows.get(str(req.from_account_id))
+    receiver = rows.get(str(req.to_account_id))
+    if sender is None:
+        raise HTTPException(status_code=404, detail="One or both accounts not found")
+    if receiver is None or sender.balance_buckets > 0:
+        # Either the receiver does not exist or a side is hot
+        atomic_update_stats["transfer:fallback"] += 1
+        return await wallet_operations.transfer(db, req, user_id)
+    if str(sender.user_id) != str(user_id):
+        raise HTTPException(
+            status_code=403, detail="Forbidden: You don't own the source account"
+        )
+    if sender.new_balance is None:
+        raise HTTPException(status_code=400, detail="Insufficient funds")
+
+    result = {"status": "success", "new_balance": sender.new_balance}
+    await record_response(db, req.idempotency_key, result)
+    await db.commit()
+    atomic_update_stats["transfer:fast"] += 1
+    await account_cache.invalidate_balances([sender.user_id, receiver.user_id])
+    return result
+
+
+async def withdraw(db: AsyncSession, req: WithdrawRequest, user_id: str) -> dict:
+    """
+    Debit a regular account only if it covers `amount`, in a single
+    statement. Hot accounts go through the ORM path to consolidate buckets.
+    """
+    if not settings.ATOMIC_BALANCE_UPDATES:
+        return await wallet_operations.withdraw(db, req, user_id)
+
+    entry = ledger_entry_values(
+        req.account_id, -req.amount, "WITHDRAW", req.idempotency_key
+    )
+    rows = await _execute(
+        db,
+        WITHDRAW_SQL,
+        {
+            "account_id": req.account_id,
+            "amount": req.amount,
+            "user_id": uuid.UUID(user_id),
+        },
+        [entry],
+    )
+    account = rows.get(str(req.account_id))
+    if account is None or str(account.user_id) != str(user_id):
+        raise HTTPException(status_code=404, detail="Account not found")
+    if account.balance_buckets > 0:
+        atomic_update_stats["withdraw:fallback"] += 1
+        return await wallet_operations.withdraw(db, req, user_id)
+    if account.new_balance is None:
+        raise HTTPException(status_code=400, detail="Insufficient funds")
+
+    result = {"status": "success", "new_balance": account.new_balance}
+    await record_response(db, req.idempotency_key, result)
+    await db.commit()
+    atomic_update_stats["withdraw:fast"] += 1
+    await account_cache.invalidate_balances([account.user_id])
+    return result
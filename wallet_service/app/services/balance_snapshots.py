@@ -0,0 +1,228 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List, Optional
+
+from app.core.config import settings
+from app.db.database import async_session
+from app.models.account import Account
+from app.models.balance_snapshot import BalanceSnapshot
+from app.models.transaction import Transaction
+from app.services.hot_accounts import buckets_total
+from app.services.ledger_partitions import oldest_partition_month
+from fastapi import HTTPException
+from sqlalchemy import (
+    DateTime,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    true,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(settings.PROJECT_NAME)
+
+# Arbitrary constant shared by every node running compaction
+SNAPSHOT_ADVISORY_LOCK_ID = 5_310_001
+
+# Inlined rather than bound: asyncpg only binds datetimes to timestamptz
+_NO_LOWER_BOUND = literal_column("'-infinity'::timestamptz")
+
+
+def _latest_snapshot():
+    return (
+        select(BalanceSnapshot.balance, BalanceSnapshot.taken_at)
+        .where(BalanceSnapshot.account_id == Account.id)
+        .order_by(BalanceSnapshot.taken_at.desc())
+        .limit(1)
+        .lateral("last_snapshot")
+    )
+
+
+def _ledger_tail(last, until: Optional[datetime] = None):
+    query = select(func.sum(Transaction.amount).label("amount")).where(
+        Transaction.account_id == Account.id,
+        Transaction.created_at > func.coalesce(last.c.taken_at, _NO_LOWER_BOUND),
+    )
+    if until is not None:
+        query = query.where(Transaction.created_at <= until)
+    return query.lateral("ledger_tail")
+
+
+async def compact_snapshots(db: AsyncSession, cutoff: Optional[datetime] = None) -> int:
+    """
+    Write a new snapshot for every account whose ledger moved since its
+    latest snapshot. Returns the number of snapshots written, or 0 if another
+    node is already compacting.
+
+    The cutoff trails "now" by BALANCE_SNAPSHOT_LAG_SECONDS so transactions
+    still in flight are not left behind the watermark.
+    """
+    if cutoff is None:
+        cutoff = datetime.now(timezone.utc) - timedelta(
+            seconds=settings.BALANCE_SNAPSHOT_LAG_SECONDS
+        )
+
+    locked = await db.scalar(
+        select(func.pg_try_advisory_xact_lock(SNAPSHOT_ADVISORY_LOCK_ID))
+    )
+    if not locked:
+        await db.rollback()
+        return 0
+
+    last = _latest_snapshot()
+    tail = _ledger_tail(last, until=cutoff)
+    rows = (
+        select(
+            Account.id,
+            func.coalesce(last.c.balance, 0) + func.coalesce(tail.c.amount, 0),
+            literal(cutoff, DateTime(timezone=True)),
+        )
+        .select_from(Account)
+        .outerjoin(last, true())
+        .join(tail, true())
+        .where(or_(last.c.taken_at.is_(None), tail.c.amount.is_not(None)))
+    )
+    result = await db.execute(
+        insert(BalanceSnapshot).from_select(
+            ["account_id", "balance", "taken_at"], rows, include_defaults=False
+        )
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def _nearest_snapshot(
+    db: AsyncSession, account_id: uuid.UUID, at: datetime, before: bool
+):
+    taken_at = BalanceSnapshot.taken_at
+    return (
+        await db.execute(
+            select(BalanceSnapshot.balance, taken_at)
+            .where(
+                BalanceSnapshot.account_id == account_id,
+                taken_at <= at if before else taken_at >= at,
+            )
+            .order_by(taken_at.desc() if before else taken_at.asc())
+            .limit(1)
+        )
+    ).first()
+
+
+async def balance_at(db: AsyncSession, account_id: uuid.UUID, at: datetime) -> Decimal:
+    """
+    Ledger balance of an account as of `at`: the nearest earlier snapshot plus
+    the transactions recorded after it.
+
+    Archived ledger months can't be summed. Before the oldest attached
+    partition the balance is unknown (400); if the earlier snapshot is older
+    than that partition, the balance is taken back from the nearest later
+    snapshot instead. Without a later snapshot the earlier one is the latest,
+    and archival guarantees the latest snapshot covers every archived row.
+    """
+    oldest = await oldest_partition_month(db)
+    if oldest is not None and at < oldest:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Ledger before {oldest.date().isoformat()} is archived",
+        )
+
+    amounts = select(func.coalesce(func.sum(Transaction.amount), 0)).where(
+        Transaction.account_id == account_id
+    )
+    snapshot = await _nearest_snapshot(db, account_id, at, before=True)
+    if oldest is not None and (snapshot is None or snapshot.taken_at < oldest):
+        later = await _nearest_snapshot(db, account_id, at, before=False)
+        if later is not None:
+            after = await db.scalar(
+                amounts.where(
+                    Transaction.created_at > at,
+                    Transaction.created_at <= later.taken_at,
+                )
+            )
+            return later.balance - after
+
+    query = amounts.where(Transaction.created_at <= at)
+    if snapshot is not None:
+        query = query.where(Transaction.created_at > snapshot.taken_at)
+    tail = await db.scalar(query)
+    return (snapshot.balance if snapshot is not None else Decimal("0")) + tail
+
+
+async def find_balance_drift(
+    db: AsyncSession,
+    lower: Optional[uuid.UUID] = None,
+    upper: Optional[uuid.UUID] = None,
+    full_ledger: bool = False,
+) -> List[dict]:
+    """
+    Compare the account balance with latest snapshot + ledger tail for every
+    account with `lower <= id < upper` and return the ones that differ. Only
+    rows newer than each account's latest snapshot are read.
+
+    `full_ledger` sums every ledger row instead and ignores snapshots; it is
+    only meaningful while no ledger partition has been archived.
+    """
+    if full_ledger:
+        tail = (
+            select(func.sum(Transaction.amount).label("amount"))
+            .where(Transaction.account_id == Account.id)
+            .lateral("ledger_tail")
+        )
+        ledger_balance = func.coalesce(tail.c.amount, 0)
+        query = select(Account.id).select_from(Account).join(tail, true())
+    else:
+        last = _latest_snapshot()
+        tail = _ledger_tail(last)
+        ledger_balance = func.coalesce(last.c.balance, 0) + func.coalesce(
+            tail.c.amount, 0
+        )
+        query = (
+            select(Account.id)
+            .select_from(Account)
+            .outerjoin(last, true())
+            .join(tail, true())
+        )
+    if lower is not None:
+        query = query.where(Account.id >= lower)
+    if upper is not None:
+        query = query.where(Account.id < upper)
+
+    # Hot accounts keep part of their balance in bucket rows
+    account_balance = Account.balance + buckets_total()
+    result = await db.execute(
+        query.add_columns(
+            account_balance.label("balance"),
+            ledger_balance.label("ledger_balance"),
+        ).where(account_balance != ledger_balance)
+    )
+    return [
+        {
+            "account_id": str(row.id),
+            "balance": row.balance,
+            "ledger_balance": row.ledger_balance,
+            "drift": row.balance - row.ledger_balance,
+        }
+        for row in result
+    ]
+
+
+async def run_snapshot_worker(interval_seconds: float) -> None:
+    """
+    Compact snapshots forever, every `interval_seconds`.
+    """
+    while True:
+        try:
+            async with async_session() as db:
+                written = await compact_snapshots(db)
+            logger.info(f"Balance snapshots written: {written}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error(f"Balance snapshot compaction failed: {exc}")
+        await asyncio.sleep(interval_seconds)
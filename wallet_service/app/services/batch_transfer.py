@@ -0,0 +1,162 @@
+from decimal import Decimal
+from typing import List, Optional
+
+from app.models.account import Account
+from app.models.outbox_event import OutboxEvent
+from app.models.transaction import Transaction
+from app.models.transaction_key import TransactionKey
+from app.schemas.schemas import BatchTransferItemResult, TransferRequest
+from app.services.account_cache import account_cache
+from app.services.fx_rates import fx_rates
+from app.services.hot_accounts import consolidate
+from app.services.outbox import ledger_entry_values, ledger_event_values
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# A concurrent request may commit one of our idempotency keys between the
+# pre-check and our commit. One extra pass is enough to report it as 409.
+MAX_SETTLE_ATTEMPTS = 2
+
+
+def _result(
+    item: TransferRequest,
+    status_code: int,
+    detail: str,
+    new_balance: Optional[Decimal] = None,
+) -> BatchTransferItemResult:
+    return BatchTransferItemResult(
+        idempotency_key=item.idempotency_key,
+        status_code=status_code,
+        detail=detail,
+        new_balance=new_balance,
+    )
+
+
+async def _settle_once(
+    db: AsyncSession, user_id: str, items: List[TransferRequest]
+) -> List[BatchTransferItemResult]:
+    keys = [item.idempotency_key for item in items]
+    processed = set(
+        (
+            await db.execute(
+                select(TransactionKey.idempotency_key).where(
+                    TransactionKey.idempotency_key.in_(keys)
+                )
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+    # Lock every involved account exactly once, in primary key order,
+    # the same ordering rule transfer_funds uses to avoid deadlocks
+    ids = sorted(
+        {item.from_account_id for item in items}
+        | {item.to_account_id for item in items}
+    )
+    res = await db.execute(
+        select(Account)
+        .where(Account.id.in_(ids))
+        .order_by(Account.id)
+        .with_for_update(key_share=True)
+    )
+    accounts = {str(a.id): a for a in res.scalars().all()}
+
+    # Hot senders are debited from the account row, so fold their buckets in
+    # once up front. Receivers are credited on the already locked row
+    senders = {str(item.from_account_id) for item in items}
+    for account_id, account in accounts.items():
+        if account_id in senders and account.balance_buckets > 0:
+            await consolidate(db, account)
+
+    # One rate version for the whole batch
+    rates = fx_rates.current
+    results: List[BatchTransferItemResult] = []
+    rows = []
+    owners = set()
+    for item in items:
+        if item.idempotency_key in processed:
+            results.append(_result(item, 409, "Transaction already processed"))
+            continue
+
+        sender = accounts.get(str(item.from_account_id))
+        receiver = accounts.get(str(item.to_account_id))
+        if not sender or not receiver or sender is receiver:
+            results.append(_result(item, 404, "One or both accounts not found"))
+            continue
+
+        if str(sender.user_id) != str(user_id):
+            results.append(
+                _result(item, 403, "Forbidden: You don't own the source account")
+            )
+            continue
+
+        try:
+            credit_amount, fx_rate = rates.convert(
+                item.amount, sender.currency, receiver.currency
+            )
+        except HTTPException as exc:
+            results.append(_result(item, exc.status_code, exc.detail))
+            continue
+
+        if sender.balance < item.amount:
+            results.append(_result(item, 400, "Insufficient funds"))
+            continue
+
+        sender.balance -= item.amount
+        receiver.balance += credit_amount
+        processed.add(item.idempotency_key)
+        owners.update((sender.user_id, receiver.user_id))
+
+        rows.append(
+            ledger_entry_values(
+                sender.id,
+                -item.amount,
+                "TRANSFER_OUT",
+                item.idempotency_key,
+                fx_rate,
+            )
+        )
+        rows.append(
+            ledger_entry_values(
+                receiver.id,
+                credit_amount,
+                "TRANSFER_IN",
+                f"__internal__:tx:{item.idempotency_key}:in",
+                fx_rate,
+            )
+        )
+        results.append(_result(item, 200, "success", sender.balance))
+
+    if rows:
+        # Emitted by SQLAlchemy as a single multi-row INSERT ... VALUES
+        await db.execute(insert(Transaction), rows)
+        await db.execute(
+            insert(OutboxEvent), [ledger_event_values(row) for row in rows]
+        )
+    await db.commit()
+    await account_cache.invalidate_balances(owners)
+    return results
+
+
+async def settle_transfer_batch(
+    db: AsyncSession, user_id: str, items: List[TransferRequest]
+) -> List[BatchTransferItemResult]:
+    """
+    Settle many transfers in one database transaction.
+
+    Every item gets its own result; a failed item does not affect the others.
+    Balances are checked against the running in-memory balance, so items are
+    applied in request order.
+    """
+    attempt = 1
+    while True:
+        try:
+            return await _settle_once(db, user_id, items)
+        except IntegrityError:
+            await db.rollback()
+            if attempt >= MAX_SETTLE_ATTEMPTS:
+                raise
+            attempt += 1
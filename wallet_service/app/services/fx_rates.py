@@ -0,0 +1,148 @@
+import asyncio
+import json
+import logging
+import time
+from collections import Counter
+from decimal import ROUND_HALF_EVEN, Decimal
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+from app.db.database import async_session
+from app.models.fx_rate import FxRate
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+logger = logging.getLogger(settings.PROJECT_NAME)
+
+# Scales of transactions.fx_rate and of money columns
+RATE_QUANTUM = Decimal("0.00000001")
+AMOUNT_QUANTUM = Decimal("0.0001")
+
+
+class FxRates(NamedTuple):
+    """
+    One immutable version of the rate table: the value of one unit of each
+    currency in `base`. A refresh never touches a published snapshot, it
+    publishes a new one.
+    """
+
+    version: int
+    base: str
+    rates: Mapping[str, Decimal]
+    loaded_at: Optional[float]
+
+    def convert(
+        self, amount: Decimal, from_currency: str, to_currency: str
+    ) -> Tuple[Decimal, Optional[Decimal]]:
+        """
+        Amount to credit in `to_currency` for `amount` of `from_currency`, and
+        the rate applied (None if the currencies match). The cross rate is
+        rounded to the scale it is recorded at and the amount is computed from
+        the rounded rate, so the ledger row reproduces it.
+        """
+        if from_currency == to_currency:
+            return amount, None
+        if from_currency not in self.rates or to_currency not in self.rates:
+            raise HTTPException(
+                status_code=400,
+                detail=f"No exchange rate for {from_currency}/{to_currency}",
+            )
+        rate = (self.rates[from_currency] / self.rates[to_currency]).quantize(
+            RATE_QUANTUM, ROUND_HALF_EVEN
+        )
+        converted = (amount * rate).quantize(AMOUNT_QUANTUM, ROUND_HALF_EVEN)
+        if converted <= 0:
+            raise HTTPException(status_code=400, detail="Amount too small to convert")
+        return converted, rate
+
+
+def read_rates_file(path: str) -> Dict[str, Decimal]:
+    with open(path) as f:
+        return {
+            currency: Decimal(str(rate))
+            for currency, rate in json.load(f, parse_float=Decimal).items()
+        }
+
+
+class FxRateCache:
+    """
+    Copy-on-write cache of the rate table.
+
+    `current` is replaced as a whole on refresh and never modified, so a
+    money operation reads it once, converts without a database round trip
+    and sees one consistent version throughout. Rates come from
+    `FX_RATES_FILE` if set, otherwise from the `fx_rates` table; a failed
+    refresh keeps the last good snapshot.
+    """
+
+    def __init__(
+        self,
+        base: str = settings.FX_BASE_CURRENCY,
+        path: str = settings.FX_RATES_FILE,
+        interval: float = settings.FX_RATES_REFRESH_SECONDS,
+        sessionmaker: async_sessionmaker = async_session,
+    ):
+        self.base = base
+        self.path = path
+        self.interval = interval
+        self.sessionmaker = sessionmaker
+        self.stats = Counter()
+        self.current = FxRates(0, base, MappingProxyType({base: Decimal(1)}), None)
+
+    def publish(self, rates: Mapping[str, Decimal]) -> FxRates:
+        """
+        Install `rates` as the next version, unless they match the current
+        one. The base currency is always worth 1.
+        """
+        rates = {**rates, self.base: rates.get(self.base, Decimal(1))}
+        for currency, rate in rates.items():
+            if len(currency) != 3 or not currency.isalpha() or not currency.isupper():
+                raise ValueError(f"Invalid currency code: {currency!r}")
+            if not rate > 0:
+                raise ValueError(f"Rate of {currency} must be positive")
+        if rates[self.base] != 1:
+            raise ValueError(f"Rate of the base currency {self.base} must be 1")
+
+        if rates != self.current.rates:
+            self.current = FxRates(
+                self.current.version + 1,
+                self.base,
+                MappingProxyType(rates),
+                time.time(),
+            )
+        return self.current
+
+    async def load(self) -> Dict[str, Decimal]:
+        if self.path:
+            return await asyncio.to_thread(read_rates_file, self.path)
+        async with self.sessionmaker() as db:
+            result = await db.execute(select(FxRate.currency, FxRate.rate))
+            return {row.currency: row.rate for row in result}
+
+    async def refresh(self) -> FxRates:
+        try:
+            snapshot = self.publish(await self.load())
+        except Exception:
+            self.stats["failures"] += 1
+            raise
+        self.stats["refreshes"] += 1
+        return snapshot
+
+    async def run(self) -> None:
+        """
+        Refresh every `interval` seconds until cancelled. The initial load
+        is left to the caller.
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.error(f"FX rates refresh failed: {exc}")
+
+
+fx_rates = FxRateCache()
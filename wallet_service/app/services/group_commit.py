@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+from app.core.config import settings
+from app.db.database import async_session
+from app.models.account import Account
+from app.models.idempotency_record import IdempotencyRecord
+from app.models.outbox_event import OutboxEvent
+from app.models.transaction import Transaction
+from app.schemas.schemas import DepositRequest
+from app.services.account_cache import account_cache
+from app.services.hot_accounts import credit, total_balance
+from app.services.idempotency import COMPLETED, IN_PROGRESS, request_fingerprint
+from app.services.outbox import ledger_entry_values, ledger_event_values
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(settings.PROJECT_NAME)
+
+
+class _PendingDeposit(NamedTuple):
+    req: DepositRequest
+    user_id: str
+    future: asyncio.Future
+
+
+class DepositBatcher:
+    """
+    Group commit for deposits: requests arriving within `linger` seconds of
+    each other (at most `max_batch`) share one transaction and one WAL flush.
+
+    A batch claims the idempotency keys, credits the accounts, writes the
+    ledger rows, outbox events and completed idempotency records, and
+    commits once. Only the plain case is batched: an unknown or foreign
+    account, a key that was already used and any database error hand the
+    request back to the caller, which runs the regular deposit path, so
+    every response matches that path.
+    """
+
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker = async_session,
+        max_batch: int = settings.DEPOSIT_BATCH_MAX_SIZE,
+        linger: float = settings.DEPOSIT_BATCH_LINGER_MS / 1000,
+    ):
+        self.sessionmaker = sessionmaker
+        self.max_batch = max_batch
+        self.linger = linger
+        self.stats = Counter()
+        self._pending: List[_PendingDeposit] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def submit(self, req: DepositRequest, user_id: str) -> Optional[dict]:
+        """
+        Queue a deposit. Returns its response, or None if the caller has to
+        run the regular deposit path.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(_PendingDeposit(req, user_id, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.linger, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._settle(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _settle(self, batch: List[_PendingDeposit]) -> None:
+        try:
+            async with self.sessionmaker() as db:
+                results = await self._apply(db, batch)
+        except SQLAlchemyError as exc:
+            # Nothing was committed, the regular path retries or reports it
+            logger.warning(f"Deposit batch of {len(batch)} fell back: {exc}")
+            results = [None] * len(batch)
+        except Exception as exc:
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            return
+
+        self.stats["batches"] += 1
+        for item, result in zip(batch, results):
+            self.stats["batched" if result is not None else "fallback"] += 1
+            # A caller that went away still had its deposit applied; a retry
+            # with the same key is answered from the idempotency record
+            if not item.future.done():
+                item.future.set_result(result)
+
+    async def _apply(
+        self, db: AsyncSession, batch: List[_PendingDeposit]
+    ) -> List[Optional[dict]]:
+        results: List[Optional[dict]] = [None] * len(batch)
+
+        # Later requests reusing a key of the same batch take the regular path
+        first_by_key: Dict[str, int] = {}
+        for index, item in enumerate(batch):
+            first_by_key.setdefault(item.req.idempotency_key, index)
+
+        # Regular accounts are locked once, in primary key order; hot
+        # accounts are read without a lock and credited through a bucket
+        ids = sorted({batch[index].req.account_id for index in first_by_key.values()})
+        res = await db.execute(
+            select(Account)
+            .where(Account.id.in_(ids), Account.balance_buckets == 0)
+            .order_by(Account.id)
+            .with_for_update(key_share=True)
+        )
+        accounts = {account.id: account for account in res.scalars().all()}
+        unlocked = [account_id for account_id in ids if account_id not in accounts]
+        if unlocked:
+            res = await db.execute(select(Account).where(Account.id.in_(unlocked)))
+            accounts.update({account.id: account for account in res.scalars().all()})
+
+        eligible = [
+            index
+            for index in first_by_key.values()
+            if (account := accounts.get(batch[index].req.account_id)) is not None
+            and str(account.user_id) == str(batch[index].user_id)
+        ]
+        if not eligible:
+            await db.rollback()
+            return results
+
+        # Claims in key order, so overlapping batches can't deadlock
+        now = datetime.now(timezone.utc)
+        claimed = set(
+            (
+                await db.execute(
+                    pg_insert(IdempotencyRecord)
+                    .values(
+                        [
+                            {
+                                "key": batch[index].req.idempotency_key,
+                                "user_id": uuid.UUID(str(batch[index].user_id)),
+                                "request_hash": request_fingerprint(
+                                    "deposit", batch[index].req
+                                ),
+                                "status": IN_PROGRESS,
+                                "created_at": now,
+                            }
+                            for index in sorted(
+                                eligible, key=lambda i: batch[i].req.idempotency_key
+                            )
+                        ]
+                    )
+                    .on_conflict_do_nothing(index_elements=["key"])
+                    .returning(IdempotencyRecord.key)
+                )
+            )
+            .scalars()
+            .all()
+        )
+
+        entries = []
+        hot_items: Dict[uuid.UUID, List[int]] = {}
+        for index in sorted(eligible):
+            req = batch[index].req
+            if req.idempotency_key not in claimed:
+                continue
+            account = accounts[req.account_id]
+            await credit(db, account, req.amount)
+            entries.append(
+                ledger_entry_values(
+                    account.id, req.amount, "DEPOSIT", req.idempotency_key
+                )
+            )
+            if account.balance_buckets > 0:
+                hot_items.setdefault(account.id, []).append(index)
+            else:
+                results[index] = {"status": "success", "new_balance": account.balance}
+
+        if not entries:
+            await db.rollback()
+            return results
+
+        # Emitted by SQLAlchemy as single multi-row INSERTs
+        await db.execute(insert(Transaction), entries)
+        await db.execute(
+            insert(OutboxEvent), [ledger_event_values(entry) for entry in entries]
+        )
+        for account_id, indexes in hot_items.items():
+            balance = await total_balance(db, accounts[account_id])
+            for index in indexes:
+                results[index] = {"status": "success", "new_balance": balance}
+
+        await db.execute(
+            update(IdempotencyRecord),
+            [
+                {
+                    "key": batch[index].req.idempotency_key,
+                    "status": COMPLETED,
+                    "response_status": 200,
+                    "response_body": jsonable_encoder(results[index]),
+                    "completed_at": now,
+                }
+                for index, result in enumerate(results)
+                if result is not None
+            ],
+        )
+        await db.commit()
+        await account_cache.invalidate_balances(
+            {
+                accounts[batch[index].req.account_id].user_id
+                for index, result in enumerate(results)
+                if result is not None
+            }
+        )
+        return results
+
+
+deposit_batcher = DepositBatcher() if settings.DEPOSIT_GROUP_COMMIT else None
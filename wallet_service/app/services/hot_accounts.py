@@ -0,0 +1,140 @@
+import random
+import uuid
+from decimal import Decimal
+
+from app.core.config import settings
+from app.models.account import Account
+from app.models.account_balance_bucket import AccountBalanceBucket
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def buckets_total():
+    """
+    Correlated subquery summing the buckets of `Account`, 0 for regular accounts.
+    """
+    return (
+        select(func.coalesce(func.sum(AccountBalanceBucket.balance), 0))
+        .where(AccountBalanceBucket.account_id == Account.id)
+        .scalar_subquery()
+    )
+
+
+async def credit(db: AsyncSession, account: Account, amount: Decimal) -> None:
+    """
+    Add `amount` to an account.
+
+    Regular accounts must be locked by the caller. Hot accounts are credited
+    through one random bucket row, without touching the account row.
+    """
+    if account.balance_buckets > 0:
+        res = await db.execute(
+            update(AccountBalanceBucket)
+            .where(
+                AccountBalanceBucket.account_id == account.id,
+                AccountBalanceBucket.bucket
+                == random.randrange(account.balance_buckets),
+            )
+            .values(balance=AccountBalanceBucket.balance + amount)
+            .execution_options(synchronize_session=False)
+        )
+        if res.rowcount == 1:
+            return
+        # Hot mode was switched off concurrently, fall back to the account row
+        await db.refresh(account, with_for_update={"key_share": True})
+    account.balance += amount
+
+
+async def consolidate(db: AsyncSession, account: Account) -> None:
+    """
+    Move all bucket balances into the account row. The caller must hold the
+    account row lock.
+    """
+    res = await db.execute(
+        select(AccountBalanceBucket.balance)
+        .where(AccountBalanceBucket.account_id == account.id)
+        .order_by(AccountBalanceBucket.bucket)
+        .with_for_update()
+    )
+    pending = sum(res.scalars().all(), Decimal("0"))
+    if pending:
+        await db.execute(
+            update(AccountBalanceBucket)
+            .where(AccountBalanceBucket.account_id == account.id)
+            .values(balance=0)
+            .execution_options(synchronize_session=False)
+        )
+        account.balance += pending
+
+
+async def ensure_available(db: AsyncSession, account: Account, amount: Decimal) -> bool:
+    """
+    Check that a locked account can be debited by `amount`, consolidating
+    hot account buckets only when the account row alone is not enough.
+    """
+    if account.balance >= amount:
+        return True
+    if account.balance_buckets > 0:
+        await consolidate(db, account)
+    return account.balance >= amount
+
+
+async def total_balance(db: AsyncSession, account: Account) -> Decimal:
+    if account.balance_buckets == 0:
+        return account.balance
+    return await db.scalar(
+        select(Account.balance + buckets_total()).where(Account.id == account.id)
+    )
+
+
+async def enable_hot_mode(
+    db: AsyncSession, account_id: uuid.UUID, buckets: int
+) -> Account:
+    """
+    Switch an account to hot mode with `buckets` empty buckets. The existing
+    balance stays on the account row.
+    """
+    if not 1 <= buckets <= settings.HOT_ACCOUNT_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Buckets must be between 1 and {settings.HOT_ACCOUNT_MAX_BUCKETS}",
+        )
+
+    account = await db.get(Account, account_id, with_for_update=True)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if account.balance_buckets > 0:
+        raise HTTPException(status_code=409, detail="Account is already hot")
+
+    await db.execute(
+        insert(AccountBalanceBucket),
+        [
+            {"account_id": account.id, "bucket": bucket, "balance": Decimal("0")}
+            for bucket in range(buckets)
+        ],
+    )
+    account.balance_buckets = buckets
+    await db.commit()
+    return account
+
+
+async def disable_hot_mode(db: AsyncSession, account_id: uuid.UUID) -> Account:
+    """
+    Fold all buckets back into the account row and make it regular again.
+    """
+    account = await db.get(Account, account_id, with_for_update=True)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if account.balance_buckets == 0:
+        return account
+
+    await consolidate(db, account)
+    await db.execute(
+        delete(AccountBalanceBucket)
+        .where(AccountBalanceBucket.account_id == account.id)
+        .execution_options(synchronize_session=False)
+    )
+    account.balance_buckets = 0
+    await db.commit()
+    return account
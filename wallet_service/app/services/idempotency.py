@@ -0,0 +1,176 @@
+import hashlib
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from app.core.config import settings
+from app.db.unit_of_work import run_in_transaction
+from app.models.idempotency_record import IdempotencyRecord
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import delete, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+IN_PROGRESS = "IN_PROGRESS"
+COMPLETED = "COMPLETED"
+
+# Per-process counters of how duplicate keys were answered
+idempotency_stats = {"replayed": 0, "in_progress": 0, "mismatch": 0}
+
+
+def request_fingerprint(operation: str, req: BaseModel) -> str:
+    payload = json.dumps(
+        [operation, req.model_dump(mode="json")], sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def _claim(
+    db: AsyncSession, key: str, user_id: str, request_hash: str
+) -> Optional[IdempotencyRecord]:
+    """
+    Claim `key` for this request. Returns None if the caller now owns the key,
+    otherwise the record left by an earlier request with the same key.
+    """
+    now = datetime.now(timezone.utc)
+    claimed = await db.scalar(
+        insert(IdempotencyRecord)
+        .values(
+            key=key,
+            user_id=uuid.UUID(user_id),
+            request_hash=request_hash,
+            status=IN_PROGRESS,
+            created_at=now,
+        )
+        .on_conflict_do_nothing(index_elements=["key"])
+        .returning(IdempotencyRecord.key)
+    )
+    if claimed is None:
+        # Take over a claim abandoned by a crashed or timed out request
+        claimed = await db.scalar(
+            update(IdempotencyRecord)
+            .where(
+                IdempotencyRecord.key == key,
+                IdempotencyRecord.status == IN_PROGRESS,
+                IdempotencyRecord.user_id == uuid.UUID(user_id),
+                IdempotencyRecord.request_hash == request_hash,
+                IdempotencyRecord.created_at
+                < now - timedelta(seconds=settings.IDEMPOTENCY_CLAIM_TIMEOUT_SECONDS),
+            )
+            .values(created_at=now)
+            .returning(IdempotencyRecord.key)
+            .execution_options(synchronize_session=False)
+        )
+    if claimed is not None:
+        await db.commit()
+        return None
+
+    record = await db.get(IdempotencyRecord, key)
+    await db.commit()
+    return record
+
+
+def _replay(record: IdempotencyRecord, user_id: str, request_hash: str):
+    if str(record.user_id) != str(user_id):
+        raise HTTPException(status_code=409, detail="Transaction already processed")
+    if record.request_hash != request_hash:
+        idempotency_stats["mismatch"] += 1
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency key was already used for a different request",
+        )
+    if record.status != COMPLETED:
+        idempotency_stats["in_progress"] += 1
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this idempotency key is already in progress",
+        )
+    idempotency_stats["replayed"] += 1
+    return JSONResponse(
+        status_code=record.response_status,
+        content=record.response_body,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+async def record_response(db: AsyncSession, key: str, result: dict) -> None:
+    """
+    Store `result` as the response to the claim on `key`. Money operations
+    call it right before their commit, so the ledger rows and the stored
+    response become durable together. Does nothing if `key` is not claimed.
+    """
+    await db.execute(
+        update(IdempotencyRecord)
+        .where(IdempotencyRecord.key == key, IdempotencyRecord.status == IN_PROGRESS)
+        .values(
+            status=COMPLETED,
+            response_status=200,
+            response_body=jsonable_encoder(result),
+            completed_at=datetime.now(timezone.utc),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def run_idempotent(
+    db: AsyncSession,
+    req: BaseModel,
+    user_id: str,
+    work: Callable[..., Awaitable[dict]],
+):
+    """
+    Run a money operation at most once per `req.idempotency_key`.
+
+    A repeated key is answered from the stored original response before any
+    account row is locked. A duplicate that arrives while the original is
+    still running gets 409 instead of queuing on the row locks. Failed
+    requests release their claim so the key can be retried.
+
+    `work` completes the claim with `record_response` in its own transaction:
+    once the ledger rows are committed, a retry is always answered from the
+    stored response, even if this request dies before returning.
+    """
+    key = req.idempotency_key
+    request_hash = request_fingerprint(work.__name__, req)
+
+    record = await _claim(db, key, user_id, request_hash)
+    if record is not None:
+        return _replay(record, user_id, request_hash)
+
+    try:
+        result = await run_in_transaction(db, work, req, user_id)
+    except Exception:
+        await db.rollback()
+        await db.execute(
+            delete(IdempotencyRecord)
+            .where(
+                IdempotencyRecord.key == key,
+                IdempotencyRecord.status == IN_PROGRESS,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        raise
+    return result
+
+
+async def sweep_idempotency_records(db: AsyncSession) -> int:
+    """
+    Delete records older than the retention window. Returns the number of
+    deleted rows. Keys past retention are still protected by
+    `transaction_keys` for LEDGER_KEY_RETENTION_DAYS, they just answer 409.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        hours=settings.IDEMPOTENCY_RETENTION_HOURS
+    )
+    result = await db.execute(
+        delete(IdempotencyRecord)
+        .where(IdempotencyRecord.created_at < cutoff)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,293 @@
+import asyncio
+import gzip
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from app.core.config import settings
+from app.db.database import engine
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(settings.PROJECT_NAME)
+
+# Arbitrary constant, serializes partition maintenance across nodes
+PARTITION_ADVISORY_LOCK_ID = 5_310_003
+
+PARTITION_NAME = re.compile(r"^transactions_y(\d{4})m(\d{2})$")
+
+# Partitions of the ledger plus tables left behind by an interrupted archival
+PARTITIONS_SQL = text("""
+    SELECT c.relname AS name,
+           i.inhrelid IS NOT NULL AS attached,
+           coalesce(i.inhdetachpending, false) AS detach_pending
+    FROM pg_class AS c
+    LEFT JOIN pg_inherits AS i
+        ON i.inhrelid = c.oid AND i.inhparent = 'transactions'::regclass
+    WHERE c.relkind = 'r'
+      AND c.relnamespace = current_schema()::regnamespace
+      AND c.relname ~ '^transactions_y[0-9]{4}m[0-9]{2}$'
+    ORDER BY c.relname
+    """)
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"transactions_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> datetime:
+    match = PARTITION_NAME.match(name)
+    return datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)
+
+
+async def oldest_partition_month(conn: AsyncConnection) -> Optional[datetime]:
+    """
+    First month still attached to the ledger; earlier months are archived.
+    """
+    name = await conn.scalar(text("""
+            SELECT min(c.relname)
+            FROM pg_inherits AS i
+            JOIN pg_class AS c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'transactions'::regclass
+              AND NOT i.inhdetachpending
+            """))
+    return partition_month(name) if name is not None else None
+
+
+async def list_partitions(conn: AsyncConnection) -> List[dict]:
+    return [
+        {**row._mapping, "month": partition_month(row.name).date().isoformat()}
+        for row in await conn.execute(PARTITIONS_SQL)
+    ]
+
+
+async def _advisory_lock(conn: AsyncConnection) -> None:
+    await conn.execute(
+        text("SELECT pg_advisory_lock(:id)"), {"id": PARTITION_ADVISORY_LOCK_ID}
+    )
+
+
+async def _advisory_unlock(conn: AsyncConnection) -> None:
+    await conn.execute(
+        text("SELECT pg_advisory_unlock(:id)"), {"id": PARTITION_ADVISORY_LOCK_ID}
+    )
+
+
+async def create_partitions(
+    conn: AsyncConnection,
+    ahead: int = settings.LEDGER_PARTITIONS_AHEAD,
+    now: Optional[datetime] = None,
+) -> List[str]:
+    """
+    Make sure partitions exist from the current month to `ahead` months
+    later. Returns the names of the partitions created.
+
+    A partition is created empty and then attached, which only takes a
+    SHARE UPDATE EXCLUSIVE lock on `transactions`, so inserts keep going.
+    `conn` must be in autocommit mode.
+    """
+    current = month_start(now or datetime.now(timezone.utc))
+    created = []
+    await _advisory_lock(conn)
+    try:
+        existing = {partition["name"] for partition in await list_partitions(conn)}
+        for offset in range(ahead + 1):
+            month = add_months(current, offset)
+            name = partition_name(month)
+            if name in existing:
+                continue
+            await conn.execute(
+                text(
+                    f"CREATE TABLE {name} "
+                    "(LIKE transactions INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                )
+            )
+            await conn.execute(
+                text(
+                    f"ALTER TABLE transactions ATTACH PARTITION {name} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') "
+                    f"TO ('{add_months(month, 1).isoformat()}')"
+                )
+            )
+            created.append(name)
+    finally:
+        await _advisory_unlock(conn)
+    return created
+
+
+async def _uncovered_accounts(conn: AsyncConnection, name: str) -> int:
+    """
+    Accounts with rows in partition `name` newer than their latest balance
+    snapshot. Archiving such a partition would change their ledger balance.
+    """
+    return await conn.scalar(text(f"""
+            SELECT count(*)
+            FROM (
+                SELECT account_id, max(created_at) AS last_entry
+                FROM {name}
+                GROUP BY account_id
+            ) AS ledger
+            WHERE NOT EXISTS (
+                SELECT FROM balance_snapshots AS s
+                WHERE s.account_id = ledger.account_id
+                  AND s.taken_at >= ledger.last_entry
+            )
+            """))
+
+
+async def _export(conn: AsyncConnection, name: str, directory: Path) -> dict:
+    """
+    Write a detached partition to `<directory>/<name>.csv.gz` with COPY and
+    check the row count before the file is moved into place.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{name}.csv.gz"
+    partial = path.with_name(path.name + ".partial")
+    lines = 0
+
+    raw = await conn.get_raw_connection()
+    with open(partial, "wb") as file:
+        with gzip.GzipFile(fileobj=file, mode="wb") as compressed:
+
+            async def write(chunk: bytes) -> None:
+                nonlocal lines
+                lines += chunk.count(b"\n")
+                compressed.write(chunk)
+
+            await raw.driver_connection.copy_from_table(
+                name, output=write, format="csv", header=True
+            )
+        file.flush()
+        os.fsync(file.fileno())
+
+    rows = await conn.scalar(text(f"SELECT count(*) FROM {name}"))
+    if lines - 1 != rows:
+        raise RuntimeError(f"{name}: exported {lines - 1} rows, table has {rows}")
+    os.replace(partial, path)
+    return {"partition": name, "rows": rows, "file": str(path)}
+
+
+async def archive_partitions(
+    conn: AsyncConnection,
+    keep_months: int = settings.LEDGER_HOT_MONTHS,
+    directory: str = settings.LEDGER_ARCHIVE_DIR,
+    now: Optional[datetime] = None,
+    dry_run: bool = False,
+) -> List[dict]:
+    """
+    Detach partitions older than `keep_months` full months, export each to a
+    gzipped CSV file and drop it. `conn` must be in autocommit mode.
+
+    A partition is only archived once balance snapshots cover all of its
+    rows, so snapshot + ledger tail still add up to the account balance.
+    Detaching is CONCURRENTLY and does not block the ledger; an archival
+    interrupted at any step is picked up again by the next run.
+    """
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -keep_months)
+    results = []
+    await _advisory_lock(conn)
+    try:
+        for partition in await list_partitions(conn):
+            name = partition["name"]
+            if partition_month(name) >= cutoff:
+                continue
+            if partition["attached"] and not partition["detach_pending"]:
+                uncovered = await _uncovered_accounts(conn, name)
+                if uncovered:
+                    results.append(
+                        {
+                            "partition": name,
+                            "skipped": f"{uncovered} accounts without a covering "
+                            "balance snapshot",
+                        }
+                    )
+                    continue
+            if dry_run:
+                results.append({"partition": name, "dry_run": True})
+                continue
+
+            if partition["detach_pending"]:
+                await conn.execute(
+                    text(f"ALTER TABLE transactions DETACH PARTITION {name} FINALIZE")
+                )
+            elif partition["attached"]:
+                await conn.execute(
+                    text(
+                        f"ALTER TABLE transactions DETACH PARTITION {name} "
+                        "CONCURRENTLY"
+                    )
+                )
+            result = await _export(conn, name, Path(directory))
+            await conn.execute(text(f"DROP TABLE {name}"))
+            logger.info(f"Archived ledger partition: {result}")
+            results.append(result)
+    finally:
+        await _advisory_unlock(conn)
+    return results
+
+
+async def prune_transaction_keys(
+    conn: AsyncConnection,
+    retention_days: int = settings.LEDGER_KEY_RETENTION_DAYS,
+    batch_size: int = 10000,
+) -> int:
+    """
+    Delete idempotency keys older than the retention window in short
+    batches. Returns the number of deleted keys.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    deleted = 0
+    while True:
+        result = await conn.execute(
+            text("""
+                DELETE FROM transaction_keys
+                WHERE idempotency_key IN (
+                    SELECT idempotency_key FROM transaction_keys
+                    WHERE created_at < :cutoff
+                    LIMIT :batch_size
+                )
+                """),
+            {"cutoff": cutoff, "batch_size": batch_size},
+        )
+        deleted += result.rowcount
+        if result.rowcount < batch_size:
+            return deleted
+
+
+async def ensure_partitions() -> None:
+    """
+    Create missing future partitions, so inserts never miss a partition even
+    if the maintenance job has not run for a while.
+    """
+    try:
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            created = await create_partitions(conn)
+        if created:
+            logger.info(f"Created ledger partitions: {created}")
+    except Exception as exc:
+        logger.error(f"Creating ledger partitions failed: {exc}")
+
+
+async def run_partition_worker(interval_seconds: float) -> None:
+    """
+    Create missing future partitions forever, every `interval_seconds`, so a
+    process outliving LEDGER_PARTITIONS_AHEAD months keeps a partition for
+    every row it inserts.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await ensure_partitions()
@@ -0,0 +1,243 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List, Optional, Protocol
+
+from app.core.config import settings
+from app.db.database import async_session
+from app.models.outbox_event import OutboxEvent
+from app.models.transaction import Transaction
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(settings.PROJECT_NAME)
+
+LEDGER_ENTRY_RECORDED = "ledger.entry_recorded"
+
+# Arbitrary constant, only one relay drains the outbox at a time
+RELAY_ADVISORY_LOCK_ID = 5_310_002
+
+
+def ledger_entry_values(
+    account_id: uuid.UUID,
+    amount: Decimal,
+    type: str,
+    idempotency_key: str,
+    fx_rate: Optional[Decimal] = None,
+) -> dict:
+    """
+    Column values of a new ledger row, with id and timestamp filled in so the
+    outbox event can reference them before the flush.
+    """
+    return {
+        "id": uuid.uuid4(),
+        "account_id": account_id,
+        "amount": amount,
+        "type": type,
+        "idempotency_key": idempotency_key,
+        "fx_rate": fx_rate,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def ledger_event_values(entry: dict) -> dict:
+    """
+    Outbox row describing the ledger row built by `ledger_entry_values`.
+    """
+    return {
+        "account_id": entry["account_id"],
+        "event_type": LEDGER_ENTRY_RECORDED,
+        "payload": {
+            "transaction_id": str(entry["id"]),
+            "account_id": str(entry["account_id"]),
+            "amount": str(entry["amount"]),
+            "type": entry["type"],
+            "fx_rate": str(entry["fx_rate"]) if entry["fx_rate"] is not None else None,
+            "created_at": entry["created_at"].isoformat(),
+        },
+        "created_at": entry["created_at"],
+    }
+
+
+def add_ledger_entry(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    amount: Decimal,
+    type: str,
+    idempotency_key: str,
+    fx_rate: Optional[Decimal] = None,
+) -> Transaction:
+    """
+    Add a ledger row and its outbox event to the current transaction.
+    """
+    entry = ledger_entry_values(account_id, amount, type, idempotency_key, fx_rate)
+    transaction = Transaction(**entry)
+    db.add(transaction)
+    db.add(OutboxEvent(**ledger_event_values(entry)))
+    return transaction
+
+
+class EventSink(Protocol):
+    """
+    Destination of published events. `publish` returns once the whole batch
+    is durably accepted; raising leaves the batch in the outbox for a retry.
+    """
+
+    async def publish(self, events: List[dict]) -> None: ...
+
+
+class StdoutSink:
+    async def publish(self, events: List[dict]) -> None:
+        for event in events:
+            sys.stdout.write(json.dumps(event) + "\n")
+        sys.stdout.flush()
+
+
+class FileSink:
+    """
+    Appends events as NDJSON to a local file. The batch is fsynced before
+    `publish` returns: the relay deletes the rows right after, so a batch
+    only in the page cache would be lost with the machine.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _write(self, lines: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def publish(self, events: List[dict]) -> None:
+        lines = "".join(json.dumps(event) + "\n" for event in events)
+        await asyncio.to_thread(self._write, lines)
+
+
+class QueueSink:
+    """
+    In-process sink for tests and embedded consumers. A bounded queue pushes
+    back on the relay once consumers fall behind.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+
+    async def publish(self, events: List[dict]) -> None:
+        for event in events:
+            await self.queue.put(event)
+
+
+class OutboxRelay:
+    """
+    Drains `outbox_events` in id order and hands batches to a sink.
+
+    Delivery is at least once: rows are deleted in the same transaction that
+    read them, after the sink accepted the batch. Events of one account keep
+    their relative order because balance changes of an account are serialized
+    by its row lock; concurrent credits to a hot account commute.
+    """
+
+    def __init__(
+        self,
+        sink: EventSink,
+        batch_size: int = settings.OUTBOX_BATCH_SIZE,
+        idle_interval: float = settings.OUTBOX_POLL_INTERVAL_MS / 1000,
+    ):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.idle_interval = idle_interval
+        self.stats = {
+            "published": 0,
+            "batches": 0,
+            "failures": 0,
+            "lag_seconds": 0.0,
+            "last_event_id": None,
+        }
+
+    async def relay_batch(self, db: AsyncSession) -> int:
+        """
+        Publish one batch. Returns the number of published events.
+        """
+        locked = await db.scalar(
+            select(func.pg_try_advisory_xact_lock(RELAY_ADVISORY_LOCK_ID))
+        )
+        if not locked:
+            await db.rollback()
+            return 0
+
+        rows = (
+            (
+                await db.execute(
+                    select(OutboxEvent)
+                    .order_by(OutboxEvent.id)
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        if not rows:
+            await db.rollback()
+            self.stats["lag_seconds"] = 0.0
+            return 0
+
+        self.stats["lag_seconds"] = (
+            datetime.now(timezone.utc) - rows[0].created_at
+        ).total_seconds()
+        events = [
+            {"event_id": row.id, "event_type": row.event_type, **row.payload}
+            for row in rows
+        ]
+        await self.sink.publish(events)
+
+        await db.execute(
+            delete(OutboxEvent)
+            .where(OutboxEvent.id.in_([row.id for row in rows]))
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        self.stats["published"] += len(rows)
+        self.stats["batches"] += 1
+        self.stats["last_event_id"] = rows[-1].id
+        return len(rows)
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """
+        Relay until `stop` is set. Full batches are followed immediately by
+        the next one; an empty or partial batch waits for `idle_interval`.
+        """
+        while stop is None or not stop.is_set():
+            started = time.monotonic()
+            try:
+                async with async_session() as db:
+                    published = await self.relay_batch(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                self.stats["failures"] += 1
+                logger.error(f"Outbox relay failed: {exc}")
+                published = 0
+            if published < self.batch_size:
+                await asyncio.sleep(
+                    max(0.0, self.idle_interval - (time.monotonic() - started))
+                )
+
+
+def build_sink(name: str, path: Optional[str] = None) -> EventSink:
+    if name == "stdout":
+        return StdoutSink()
+    if name == "file":
+        if not path:
+            raise ValueError("File sink requires a path")
+        return FileSink(path)
+    if name == "queue":
+        return QueueSink()
+    raise ValueError(f"Unknown outbox sink: {name}")
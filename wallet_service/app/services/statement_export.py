@@ -0,0 +1,98 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from app.db.database import engine
+from app.models.transaction import Transaction
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = ("id", "created_at", "type", "amount", "fx_rate", "idempotency_key")
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _statement_query(
+    account_id: uuid.UUID, since: Optional[datetime], until: Optional[datetime]
+):
+    query = (
+        select(*(getattr(Transaction, column) for column in EXPORT_COLUMNS))
+        .where(Transaction.account_id == account_id)
+        .order_by(Transaction.created_at, Transaction.id)
+    )
+    if since is not None:
+        query = query.where(Transaction.created_at >= since)
+    if until is not None:
+        query = query.where(Transaction.created_at < until)
+    return query
+
+
+def _format_csv(rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            [
+                row.id,
+                row.created_at.isoformat(),
+                row.type,
+                row.amount,
+                row.fx_rate,
+                row.idempotency_key,
+            ]
+        )
+    return buffer.getvalue()
+
+
+def _format_ndjson(rows) -> str:
+    return "".join(
+        json.dumps(
+            {
+                "id": str(row.id),
+                "created_at": row.created_at.isoformat(),
+                "type": row.type,
+                "amount": str(row.amount),
+                "fx_rate": str(row.fx_rate) if row.fx_rate is not None else None,
+                "idempotency_key": row.idempotency_key,
+            }
+        )
+        + "\n"
+        for row in rows
+    )
+
+
+async def stream_statement(
+    account_id: uuid.UUID,
+    export_format: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    bind: Optional[AsyncEngine] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield an account's ledger as CSV or NDJSON chunks.
+
+    Rows are read as plain tuples through a server-side cursor on a dedicated
+    connection, so memory stays bounded by one chunk regardless of history size.
+    `bind` picks the server (e.g. the read replica), the primary by default.
+    """
+    formatter = _format_csv if export_format == "csv" else _format_ndjson
+    if export_format == "csv":
+        yield ",".join(EXPORT_COLUMNS) + "\r\n"
+
+    async with (bind or engine).connect() as conn:
+        result = await conn.stream(
+            _statement_query(account_id, since, until).execution_options(
+                yield_per=EXPORT_CHUNK_SIZE
+            )
+        )
+        async for rows in result.partitions():
+            yield formatter(rows)
@@ -0,0 +1,154 @@
+from app.models.account import Account
+from app.schemas.schemas import DepositRequest, TransferRequest, WithdrawRequest
+from app.services.account_cache import account_cache
+from app.services.fx_rates import fx_rates
+from app.services.hot_accounts import credit, ensure_available, total_balance
+from app.services.idempotency import record_response
+from app.services.outbox import add_ledger_entry
+from fastapi import HTTPException
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def deposit(db: AsyncSession, req: DepositRequest, user_id: str) -> dict:
+    # Lock the row of a regular account. Hot accounts are read without a lock
+    # and credited through one of their bucket rows instead
+    res = await db.execute(
+        select(Account)
+        .where(Account.id == req.account_id, Account.balance_buckets == 0)
+        .with_for_update(key_share=True)
+    )
+    account = res.scalars().first() or await db.get(Account, req.account_id)
+
+    if not account or str(account.user_id) != str(user_id):
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    await credit(db, account, req.amount)
+    add_ledger_entry(
+        db,
+        account_id=account.id,
+        amount=req.amount,
+        type="DEPOSIT",
+        idempotency_key=req.idempotency_key,
+    )
+
+    try:
+        # A duplicate key fails on flush
+        await db.flush()
+        await db.refresh(account)
+        result = {"status": "success", "new_balance": await total_balance(db, account)}
+        await record_response(db, req.idempotency_key, result)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Transaction already processed")
+    await account_cache.invalidate_balances([account.user_id])
+    return result
+
+
+async def transfer(db: AsyncSession, req: TransferRequest, user_id: str) -> dict:
+    # Block both accounts in a consistent order to prevent deadlocks.
+    # A hot receiver is not locked, it is credited through a bucket row
+    ids = sorted([req.from_account_id, req.to_account_id])
+    res = await db.execute(
+        select(Account)
+        .where(
+            Account.id.in_(ids),
+            or_(Account.id == req.from_account_id, Account.balance_buckets == 0),
+        )
+        .order_by(Account.id)
+        .with_for_update(key_share=True)
+    )
+    accounts = {str(a.id): a for a in res.scalars().all()}
+    if str(req.to_account_id) not in accounts:
+        hot_receiver = await db.get(Account, req.to_account_id)
+        if hot_receiver:
+            accounts[str(hot_receiver.id)] = hot_receiver
+
+    if len(accounts) < 2:
+        raise HTTPException(status_code=404, detail="One or both accounts not found")
+
+    sender = accounts[str(req.from_account_id)]
+    receiver = accounts[str(req.to_account_id)]
+
+    if str(sender.user_id) != str(user_id):
+        raise HTTPException(
+            status_code=403, detail="Forbidden: You don't own the source account"
+        )
+
+    credit_amount, fx_rate = fx_rates.current.convert(
+        req.amount, sender.currency, receiver.currency
+    )
+    if not await ensure_available(db, sender, req.amount):
+        raise HTTPException(status_code=400, detail="Insufficient funds")
+
+    sender.balance -= req.amount
+    await credit(db, receiver, credit_amount)
+
+    add_ledger_entry(
+        db,
+        account_id=sender.id,
+        amount=-req.amount,
+        type="TRANSFER_OUT",
+        idempotency_key=req.idempotency_key,
+        fx_rate=fx_rate,
+    )
+    add_ledger_entry(
+        db,
+        account_id=receiver.id,
+        amount=credit_amount,
+        type="TRANSFER_IN",
+        idempotency_key=f"__internal__:tx:{req.idempotency_key}:in",
+        fx_rate=fx_rate,
+    )
+
+    try:
+        await db.flush()
+        result = {"status": "success", "new_balance": await total_balance(db, sender)}
+        await record_response(db, req.idempotency_key, result)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Transaction already processed")
+    await account_cache.invalidate_balances([sender.user_id, receiver.user_id])
+    return result
+
+
+async def withdraw(db: AsyncSession, req: WithdrawRequest, user_id: str) -> dict:
+    """
+    Withdraw funds from a user's account with idempotency check and row locking.
+    """
+    # Block the account row and withdraw funds
+    res = await db.execute(
+        select(Account)
+        .where(Account.id == req.account_id)
+        .with_for_update(key_share=True)
+    )
+    account = res.scalars().first()
+
+    if not account or str(account.user_id) != str(user_id):
+        raise HTTPException(status_code=404, detail="Account not found")
+
+    if not await ensure_available(db, account, req.amount):
+        raise HTTPException(status_code=400, detail="Insufficient funds")
+
+    account.balance -= req.amount
+    add_ledger_entry(
+        db,
+        account_id=account.id,
+        amount=-req.amount,
+        type="WITHDRAW",
+        idempotency_key=req.idempotency_key,
+    )
+
+    try:
+        await db.flush()
+        result = {"status": "success", "new_balance": await total_balance(db, account)}
+        await record_response(db, req.idempotency_key, result)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="Transaction already processed")
+    await account_cache.invalidate_balances([account.user_id])
+    return result
@@ -0,0 +1,318 @@
+"""
+End-to-end check of ledger maintenance against a real database.
+
+Seeds accounts whose ledger is spread over the last `--months` months and
+runs the maintenance jobs through the real driver:
+  - compaction: a snapshot for every account, none on a second run;
+  - drift check: nothing on a consistent ledger, exactly the seeded account
+    after its balance is bumped;
+  - reconciliation: a chunked run finds that account, and so does a run
+    resumed from a checkpoint that stopped short of its chunk;
+  - archival: with `--keep-months 1` every older partition is covered by the
+    snapshots, detached, exported with matching row counts and dropped;
+    afterwards point-in-time balances before the archived months are
+    rejected and later ones still match the ledger as it was.
+
+Every step is verified before its timing is reported; a failed check exits
+with status 1. The run writes rows and snapshots, so it refuses to start
+unless `accounts` is empty: point it at a scratch database migrated to head.
+
+Usage:
+    uv run python -m benchmarks.ledger_maintenance --accounts 1000 --entries 20
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from app.db.database import async_session, engine
+from app.services.balance_snapshots import (
+    balance_at,
+    compact_snapshots,
+    find_balance_drift,
+)
+from app.services.ledger_partitions import (
+    add_months,
+    archive_partitions,
+    create_partitions,
+    list_partitions,
+    month_start,
+    oldest_partition_month,
+    partition_month,
+)
+from app.services.reconciliation import Checkpoint, id_ranges, reconcile
+from fastapi import HTTPException
+from sqlalchemy import text
+
+SEED_ACCOUNTS = text("""
+    INSERT INTO accounts (id, user_id, balance, balance_buckets, currency,
+                          updated_at, created_at)
+    SELECT gen_random_uuid(), gen_random_uuid(), 0, 0, 'RUB', now(), now()
+    FROM generate_series(1, :accounts)
+    """)
+
+SEED_LEDGER = text("""
+    INSERT INTO transactions (id, idempotency_key, account_id, amount, type,
+                              created_at)
+    SELECT gen_random_uuid(), 'seed-' || gen_random_uuid(), a.id,
+           round((random() * 100)::numeric, 4) + 0.0001, 'DEPOSIT',
+           CAST(:since AS timestamptz)
+               + random() * (CAST(:until AS timestamptz) - CAST(:since AS timestamptz))
+    FROM accounts AS a, generate_series(1, :entries)
+    """)
+
+SYNC_BALANCES = text("""
+    UPDATE accounts SET balance = ledger.total
+    FROM (
+        SELECT account_id, sum(amount) AS total FROM transactions GROUP BY account_id
+    ) AS ledger
+    WHERE ledger.account_id = accounts.id
+    """)
+
+
+def expect(condition: bool, message: str) -> None:
+    if not condition:
+        raise SystemExit(f"Check failed: {message}")
+
+
+class Timer:
+    def __init__(self):
+        self.timings = {}
+
+    @contextlib.contextmanager
+    def __call__(self, name: str):
+        started = time.perf_counter()
+        yield
+        self.timings[name] = round(time.perf_counter() - started, 3)
+
+
+async def seed(args: argparse.Namespace, now: datetime) -> None:
+    since = add_months(month_start(now), -args.months)
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await create_partitions(conn, ahead=args.months + 1, now=since)
+    async with async_session() as db:
+        await db.execute(SEED_ACCOUNTS, {"accounts": args.accounts})
+        await db.execute(
+            SEED_LEDGER,
+            {
+                "since": since,
+                "until": now - timedelta(hours=1),
+                "entries": args.entries,
+            },
+        )
+        await db.execute(SYNC_BALANCES)
+        await db.commit()
+
+
+def chunk_of(account_id: str, chunks: int) -> int:
+    value = uuid.UUID(account_id)
+    for index, (lower, upper) in enumerate(id_ranges(chunks)):
+        if (lower is None or value >= lower) and (upper is None or value < upper):
+            return index
+    raise ValueError(account_id)
+
+
+async def check_reconcile(
+    args: argparse.Namespace, timer: Timer, drifted: str, directory: str
+) -> dict:
+    path = os.path.join(directory, "reconcile.checkpoint.json")
+    report = io.StringIO()
+    with timer("reconcile"):
+        summary = await reconcile(
+            async_session,
+            report,
+            Checkpoint(path, args.chunks, False),
+            concurrency=args.concurrency,
+        )
+    expect(
+        summary["reconciled"] == args.chunks and summary["failed"] == 0,
+        f"reconcile did not finish every chunk: {summary}",
+    )
+    reported = [
+        json.loads(line)["account_id"] for line in report.getvalue().splitlines()
+    ]
+    expect(
+        summary["discrepancies"] == 1 and reported == [drifted],
+        f"reconcile reported {reported}, expected {drifted}",
+    )
+
+    # A run interrupted before the drifted account's chunk
+    remaining = {chunk_of(drifted, args.chunks), args.chunks - 1}
+    interrupted = Checkpoint(path, args.chunks, False)
+    interrupted.done = set(range(args.chunks)) - remaining
+    interrupted.save()
+    resumed = Checkpoint(path, args.chunks, False)
+    resumed.load()
+    report = io.StringIO()
+    summary = await reconcile(async_session, report, resumed, concurrency=2)
+    expect(
+        summary["reconciled"] == len(remaining)
+        and summary["skipped"] == args.chunks - len(remaining)
+        and summary["failed"] == 0,
+        f"resumed run did not pick up where it stopped: {summary}",
+    )
+    reported = [
+        json.loads(line)["account_id"] for line in report.getvalue().splitlines()
+    ]
+    expect(
+        summary["discrepancies"] == 1 and reported == [drifted],
+        f"resumed run reported {reported}, expected {drifted}",
+    )
+    return summary
+
+
+async def check_archive(
+    args: argparse.Namespace, timer: Timer, now: datetime, directory: str
+) -> list:
+    cutoff = add_months(month_start(now), -args.keep_months)
+    # Ground truth for one account, read while the whole ledger is attached
+    async with async_session() as db:
+        account_id, balance = (
+            await db.execute(
+                text("SELECT id, balance FROM accounts ORDER BY id DESC LIMIT 1")
+            )
+        ).one()
+        at = cutoff + timedelta(days=1)
+        balance_then = await db.scalar(
+            text(
+                "SELECT coalesce(sum(amount), 0) FROM transactions "
+                "WHERE account_id = :id AND created_at <= :at"
+            ),
+            {"id": account_id, "at": at},
+        )
+        rows_before = await db.scalar(text("SELECT count(*) FROM transactions"))
+
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        expected = sorted(
+            partition["name"]
+            for partition in await list_partitions(conn)
+            if partition_month(partition["name"]) < cutoff
+        )
+        with timer("archive"):
+            results = await archive_partitions(
+                conn, keep_months=args.keep_months, directory=directory, now=now
+            )
+        left = {partition["name"] for partition in await list_partitions(conn)}
+
+    archived = sorted(result["partition"] for result in results if "rows" in result)
+    expect(
+        archived == expected and len(results) == len(expected),
+        f"archived {results}, expected {expected}",
+    )
+    expect(not left & set(expected), f"partitions left behind: {left}")
+    for result in results:
+        with gzip.open(result["file"], "rt") as f:
+            lines = sum(1 for _ in f) - 1
+        expect(lines == result["rows"], f"{result['file']} has {lines} rows")
+
+    async with async_session() as db:
+        rows_after = await db.scalar(text("SELECT count(*) FROM transactions"))
+        expect(
+            rows_before - rows_after == sum(result["rows"] for result in results),
+            f"ledger lost {rows_before - rows_after} rows",
+        )
+        oldest = await oldest_partition_month(db)
+        expect(oldest == cutoff, f"oldest attached partition is {oldest}")
+        try:
+            await balance_at(db, account_id, cutoff - timedelta(days=1))
+            expect(False, "balance_at answered for an archived month")
+        except HTTPException as exc:
+            expect(exc.status_code == 400, f"balance_at failed with {exc}")
+        value = await balance_at(db, account_id, at)
+        expect(value == balance_then, f"balance_at({at}) = {value}, was {balance_then}")
+        value = await balance_at(db, account_id, now)
+        expect(value == balance, f"balance_at(now) = {value}, balance is {balance}")
+    return results
+
+
+async def run(args: argparse.Namespace) -> dict:
+    timer = Timer()
+    now = datetime.now(timezone.utc)
+    report = {"config": vars(args)}
+    try:
+        async with async_session() as db:
+            existing = await db.scalar(text("SELECT count(*) FROM accounts"))
+        expect(existing == 0, f"accounts is not empty ({existing} rows)")
+
+        with timer("seed"):
+            await seed(args, now)
+
+        async with async_session() as db:
+            with timer("compact"):
+                written = await compact_snapshots(db, cutoff=now)
+            expect(written == args.accounts, f"compaction wrote {written} snapshots")
+            rewritten = await compact_snapshots(db, cutoff=now)
+            expect(rewritten == 0, f"second compaction wrote {rewritten} snapshots")
+
+            with timer("drift_check"):
+                drift = await find_balance_drift(db)
+            expect(drift == [], f"drift on a consistent ledger: {drift[:5]}")
+
+            drifted = await db.scalar(
+                text(
+                    "UPDATE accounts SET balance = balance + 1 WHERE id = "
+                    "(SELECT id FROM accounts ORDER BY id LIMIT 1) RETURNING id"
+                )
+            )
+            await db.commit()
+            drift = await find_balance_drift(db)
+            expect(
+                [row["account_id"] for row in drift] == [str(drifted)],
+                f"expected drift on {drifted} only, got {drift[:5]}",
+            )
+            expect(
+                drift[0]["balance"] - drift[0]["ledger_balance"] == Decimal(1),
+                f"unexpected drift amount: {drift[0]}",
+            )
+        report["drifted_account"] = str(drifted)
+
+        with tempfile.TemporaryDirectory() as directory:
+            await check_reconcile(args, timer, str(drifted), directory)
+            archived = await check_archive(args, timer, now, directory)
+        report["archived"] = [result["partition"] for result in archived]
+
+        # Snapshot + tail still adds up without the archived rows
+        async with async_session() as db:
+            drift = await find_balance_drift(db)
+        expect(
+            [row["account_id"] for row in drift] == [str(drifted)],
+            f"drift after archival: {drift[:5]}",
+        )
+    finally:
+        await engine.dispose()
+
+    report["timings_s"] = timer.timings
+    report["checks"] = "passed"
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--accounts", type=int, default=1000)
+    parser.add_argument("--entries", type=int, default=20, help="Rows per account")
+    parser.add_argument(
+        "--months", type=int, default=3, help="How far back the ledger reaches"
+    )
+    parser.add_argument("--chunks", type=int, default=16)
+    parser.add_argument("--keep-months", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Micro-benchmark of response serialization for a transaction history page.
+
+Renders the same page of synthetic ledger rows three ways and reports the
+cost per page:
+  - orm_model_json: ORM entities validated through the response model
+    (`from_attributes`) and rendered by the standard JSONResponse, the path
+    the history endpoint used to take;
+  - rows_model_orjson: plain rows validated through the response model and
+    rendered by ORJSONResponse, the path of every endpoint with a response
+    model;
+  - rows_orjson: plain rows rendered by ORJSONResponse directly, the path of
+    the history and account listings.
+
+Only serialization is measured, no database or HTTP. Ids are built with the
+UUID type asyncpg returns, so the rows are what the endpoints actually render.
+The paths must produce identical bytes, the benchmark checks that before
+timing.
+
+Usage:
+    uv run python -m benchmarks.serialization --rows 100 --repeat 2000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import List
+
+from app.core.responses import ORJSONResponse
+from asyncpg.pgproto.pgproto import UUID as PgUUID
+from app.models.transaction import Transaction
+from app.schemas.schemas import TransactionResponse
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+TYPES = ["DEPOSIT", "WITHDRAW", "TRANSFER_OUT", "TRANSFER_IN"]
+
+
+def random_id(rng: random.Random) -> PgUUID:
+    return PgUUID(uuid.UUID(int=rng.getrandbits(128), version=4).bytes)
+
+
+def make_rows(count: int, seed: int) -> List[dict]:
+    rng = random.Random(seed)
+    account_id = random_id(rng)
+    created_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for _ in range(count):
+        created_at += timedelta(
+            seconds=rng.randint(1, 3600), microseconds=rng.randint(0, 999999)
+        )
+        rows.append(
+            {
+                "id": random_id(rng),
+                "account_id": account_id,
+                "amount": Decimal(rng.randint(-(10**8), 10**8)).scaleb(-4),
+                "type": rng.choice(TYPES),
+                "fx_rate": rng.choice(
+                    [None, Decimal(rng.randint(1, 10**10)).scaleb(-8)]
+                ),
+                "created_at": created_at,
+            }
+        )
+    return rows
+
+
+def make_entities(rows: List[dict]) -> List[Transaction]:
+    return [Transaction(idempotency_key=f"bench-{row['id']}", **row) for row in rows]
+
+
+async def orm_model_json(field, entities) -> bytes:
+    content = await serialize_response(field=field, response_content=entities)
+    return JSONResponse(content).body
+
+
+async def rows_model_orjson(field, rows) -> bytes:
+    content = await serialize_response(field=field, response_content=rows)
+    return ORJSONResponse(content).body
+
+
+async def rows_orjson(field, rows) -> bytes:
+    return ORJSONResponse(rows).body
+
+
+async def measure(render, field, content, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await render(field, content)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return {
+        "mean_us": round(statistics.fmean(timings) * 1e6, 1),
+        "p50_us": round(timings[len(timings) // 2] * 1e6, 1),
+        "p99_us": round(timings[int(len(timings) * 0.99)] * 1e6, 1),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict:
+    field = create_model_field(
+        "Response_history", List[TransactionResponse], mode="serialization"
+    )
+    rows = make_rows(args.rows, args.seed)
+    entities = make_entities(rows)
+    paths = {
+        "orm_model_json": (orm_model_json, entities),
+        "rows_model_orjson": (rows_model_orjson, rows),
+        "rows_orjson": (rows_orjson, rows),
+    }
+
+    bodies = {
+        name: await render(field, content) for name, (render, content) in paths.items()
+    }
+    if len(set(bodies.values())) != 1:
+        raise SystemExit(f"Serialized pages differ: {bodies}")
+
+    report = {
+        "config": vars(args),
+        "page_bytes": len(bodies["rows_orjson"]),
+        "paths": {},
+    }
+    for name, (render, content) in paths.items():
+        # Warm up caches and the allocator before timing
+        await measure(render, field, content, max(args.repeat // 10, 1))
+        report["paths"][name] = await measure(render, field, content, args.repeat)
+
+    baseline = report["paths"]["orm_model_json"]["mean_us"]
+    for result in report["paths"].values():
+        result["speedup"] = round(baseline / result["mean_us"], 2)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=100, help="Rows per page")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+Concurrency load test for wallet money operations.
+
+Runs the FastAPI app in-process against the database from `.env`, mints JWTs
+(with the shared secret for HS*, otherwise with a throwaway key installed in
+the verifier) and drives a configurable mix of deposit, withdraw and
+transfer calls. A share of the calls targets a small set of hot accounts, the
+rest is spread uniformly over cold ones. With several `--currencies` the
+accounts are opened in them round-robin under a synthetic rate table, and
+transfers between currencies are reported separately as `transfer_fx`.
+
+Usage:
+    uv run --with httpx python -m benchmarks.wallet_load \\
+        --users 50 --hot-accounts 2 --hot-ratio 0.5 \\
+        --mix deposit=0.5,withdraw=0.2,transfer=0.3 \\
+        --concurrency 64 --operations 20000 --output bench.json
+
+    uv run --with httpx python -m benchmarks.wallet_load \\
+        --currencies RUB,USD,EUR --mix transfer=1 --hot-accounts 0
+
+Prints (and optionally writes) a JSON report with per-operation latency
+percentiles, throughput, deadlock / serialization failure / lock timeout
+counts and a final ledger-vs-balance invariant check.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import httpx
+from app.core.config import settings
+from app.core.rate_limit import rate_limiter
+from app.core.security import JwksTokenVerifier, token_cache
+from app.db.database import async_session, engine
+from app.main import app
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.services.fx_rates import fx_rates
+from app.services.hot_accounts import buckets_total, enable_hot_mode
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import jwk, jwt
+from sqlalchemy import event, func, select, text
+
+RETRYABLE_SQLSTATES = {
+    "40001": "serialization_failures",
+    "40P01": "deadlocks",
+    "55P03": "lock_timeouts",
+}
+
+
+BENCHMARK_KID = "benchmark"
+
+
+def signing_key():
+    """
+    Key to mint tokens with. Lifespan does not run in-process, so for
+    asymmetric algorithms a throwaway key pair is generated and its public
+    half is installed in the verifier instead of fetching the JWKS.
+    """
+    if not isinstance(token_cache.verifier, JwksTokenVerifier):
+        return settings.JWT_SECRET
+    if settings.JWT_ALGORITHM == "ES256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    key = jwk.construct(
+        private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        ),
+        settings.JWT_ALGORITHM,
+    )
+    token_cache.verifier.set_keys(
+        {"keys": [{**key.public_key().to_dict(), "kid": BENCHMARK_KID}]}
+    )
+    return key
+
+
+def mint_token(key, user_id: str) -> str:
+    expire = datetime.now(timezone.utc) + timedelta(hours=1)
+    return jwt.encode(
+        {"sub": user_id, "exp": expire},
+        key,
+        algorithm=settings.JWT_ALGORITHM,
+        headers={"kid": BENCHMARK_KID},
+    )
+
+
+def parse_mix(raw: str) -> dict[str, float]:
+    mix = {}
+    for part in raw.split(","):
+        name, weight = part.split("=")
+        if name not in ("deposit", "withdraw", "transfer"):
+            raise argparse.ArgumentTypeError(f"Unknown operation: {name}")
+        mix[name] = float(weight)
+    return mix
+
+
+def parse_currencies(raw: str) -> list[str]:
+    currencies = [part.strip().upper() for part in raw.split(",") if part.strip()]
+    if not currencies:
+        raise argparse.ArgumentTypeError("At least one currency is needed")
+    return currencies
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(
+        0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1)
+    )
+    return sorted_values[rank]
+
+
+class DatabaseErrorCounter:
+    """
+    Counts retryable Postgres errors seen by the engine, by SQLSTATE.
+    """
+
+    def __init__(self):
+        self.counts = Counter()
+
+    def __call__(self, context) -> None:
+        sqlstate = getattr(context.original_exception, "sqlstate", None)
+        if sqlstate in RETRYABLE_SQLSTATES:
+            self.counts[RETRYABLE_SQLSTATES[sqlstate]] += 1
+
+
+class Workload:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.tokens: dict[str, str] = {}
+        # account_id -> owner user_id
+        self.owners: dict[str, str] = {}
+        # account_id -> currency
+        self.currencies: dict[str, str] = {}
+        self.hot: list[str] = []
+        self.cold: list[str] = []
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, Counter] = defaultdict(Counter)
+
+    def headers(self, account_id: str) -> dict:
+        return {"Authorization": f"Bearer {self.tokens[self.owners[account_id]]}"}
+
+    def pick_account(self) -> str:
+        if self.hot and self.rng.random() < self.args.hot_ratio:
+            return self.rng.choice(self.hot)
+        return self.rng.choice(self.cold)
+
+    def pick_operation(self) -> str:
+        mix = self.args.mix
+        return self.rng.choices(list(mix), weights=list(mix.values()))[0]
+
+    def install_rates(self) -> None:
+        """
+        Publish a synthetic rate table; lifespan does not run in-process, so
+        nothing refreshes it from the real source.
+        """
+        fx_rates.publish(
+            {
+                currency: Decimal(self.rng.randint(500, 150000)) / Decimal(1000)
+                for currency in self.args.currencies
+                if currency != fx_rates.base
+            }
+        )
+
+    async def setup(self, client: httpx.AsyncClient) -> None:
+        key = signing_key()
+        self.install_rates()
+        accounts = []
+        for _ in range(self.args.users):
+            user_id = str(uuid.uuid4())
+            self.tokens[user_id] = mint_token(key, user_id)
+            for _ in range(self.args.accounts_per_user):
+                currency = self.args.currencies[
+                    len(accounts) % len(self.args.currencies)
+                ]
+                res = await client.post(
+                    "/wallet/accounts",
+                    headers={"Authorization": f"Bearer {self.tokens[user_id]}"},
+                    json={"currency": currency},
+                )
+                res.raise_for_status()
+                account_id = res.json()["id"]
+                self.owners[account_id] = user_id
+                self.currencies[account_id] = currency
+                accounts.append(account_id)
+
+        self.hot = accounts[: self.args.hot_accounts]
+        self.cold = accounts[self.args.hot_accounts :] or self.hot
+
+        if self.args.hot_buckets:
+            async with async_session() as db:
+                for account_id in self.hot:
+                    await enable_hot_mode(
+                        db, uuid.UUID(account_id), self.args.hot_buckets
+                    )
+
+        for account_id in accounts:
+            res = await client.post(
+                "/wallet/deposit",
+                headers=self.headers(account_id),
+                json={
+                    "account_id": account_id,
+                    "amount": str(self.args.initial_balance),
+                    "idempotency_key": f"bench-seed-{uuid.uuid4().hex}",
+                },
+            )
+            res.raise_for_status()
+
+    def request_for(self, operation: str) -> tuple[str, str, str, dict]:
+        """
+        Path, acting account, reporting name and body of the next call.
+        """
+        amount = str(
+            Decimal(self.rng.randint(1, self.args.max_amount * 100)) / Decimal(100)
+        )
+        key = f"bench-{uuid.uuid4().hex}"
+        if operation == "transfer":
+            source = self.pick_account()
+            target = self.pick_account()
+            while target == source and len(self.owners) > 1:
+                target = self.pick_account()
+            if self.currencies[source] != self.currencies[target]:
+                operation = "transfer_fx"
+            return (
+                "/wallet/transfer",
+                source,
+                operation,
+                {
+                    "from_account_id": source,
+                    "to_account_id": target,
+                    "amount": amount,
+                    "idempotency_key": key,
+                },
+            )
+        account_id = self.pick_account()
+        return (
+            f"/wallet/{operation}",
+            account_id,
+            operation,
+            {"account_id": account_id, "amount": amount, "idempotency_key": key},
+        )
+
+    async def worker(self, client: httpx.AsyncClient, budget: list[int]) -> None:
+        while budget[0] > 0:
+            budget[0] -= 1
+            path, account_id, operation, body = self.request_for(self.pick_operation())
+            started = time.perf_counter()
+            res = await client.post(path, headers=self.headers(account_id), json=body)
+            self.latencies[operation].append(time.perf_counter() - started)
+            self.statuses[operation][str(res.status_code)] += 1
+
+    async def invariant(self) -> dict:
+        """
+        Compare every benchmark account's balance with the sum of its ledger.
+        """
+        ids = [uuid.UUID(account_id) for account_id in self.owners]
+        ledger = (
+            select(func.coalesce(func.sum(Transaction.amount), 0))
+            .where(Transaction.account_id == Account.id)
+            .scalar_subquery()
+        )
+        async with async_session() as db:
+            rows = (
+                await db.execute(
+                    select(Account.id, Account.balance + buckets_total(), ledger).where(
+                        Account.id.in_(ids)
+                    )
+                )
+            ).all()
+        mismatches = [
+            {"account_id": str(row[0]), "balance": str(row[1]), "ledger": str(row[2])}
+            for row in rows
+            if row[1] != row[2]
+        ]
+        return {
+            "accounts_checked": len(rows),
+            "mismatches": len(mismatches),
+            "details": mismatches[:20],
+        }
+
+
+async def database_deadlocks() -> int:
+    async with engine.connect() as conn:
+        return await conn.scalar(
+            text(
+                "SELECT deadlocks FROM pg_stat_database "
+                "WHERE datname = current_database()"
+            )
+        )
+
+
+async def run(args: argparse.Namespace) -> dict:
+    # A few users drive the whole load, per-user limits would cap it
+    rate_limiter.rules = {}
+    counter = DatabaseErrorCounter()
+    event.listen(engine.sync_engine, "handle_error", counter)
+    workload = Workload(args)
+
+    # Unhandled errors still count as 500s instead of aborting the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=60
+    ) as client:
+        await workload.setup(client)
+        deadlocks_before = await database_deadlocks()
+
+        budget = [args.operations]
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(workload.worker(client, budget) for _ in range(args.concurrency))
+        )
+        elapsed = time.perf_counter() - started
+
+    deadlocks_after = await database_deadlocks()
+    invariant = await workload.invariant()
+    await engine.dispose()
+
+    operations = {}
+    for name, values in workload.latencies.items():
+        values.sort()
+        operations[name] = {
+            "count": len(values),
+            "statuses": dict(workload.statuses[name]),
+            "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+            "max_ms": round(values[-1] * 1000, 3),
+        }
+    total = sum(len(values) for values in workload.latencies.values())
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            key: value for key, value in vars(args).items() if key not in ("output",)
+        },
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "operations": operations,
+        "database_errors": {
+            name: counter.counts[name] for name in RETRYABLE_SQLSTATES.values()
+        },
+        "pg_deadlocks": deadlocks_after - deadlocks_before,
+        "invariant": invariant,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--accounts-per-user", type=int, default=2)
+    parser.add_argument("--hot-accounts", type=int, default=2)
+    parser.add_argument(
+        "--hot-ratio",
+        type=float,
+        default=0.5,
+        help="Share of operations that target a hot account",
+    )
+    parser.add_argument(
+        "--hot-buckets",
+        type=int,
+        default=0,
+        help="Enable hot account mode with this many buckets, 0 keeps them regular",
+    )
+    parser.add_argument(
+        "--mix", type=parse_mix, default="deposit=0.5,withdraw=0.2,transfer=0.3"
+    )
+    parser.add_argument(
+        "--currencies",
+        type=parse_currencies,
+        default="RUB",
+        help="Comma-separated currencies the accounts are opened in",
+    )
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--operations", type=int, default=5000)
+    parser.add_argument("--initial-balance", type=int, default=100000)
+    parser.add_argument("--max-amount", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    rendered = json.dumps(report, indent=2, default=str)
+    print(rendered)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(rendered)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,13 @@ from alembic import context
 from app.core.config import database_url
 from app.db.database import Base
 from app.models.account import Account  # noqa
+from app.models.account_balance_bucket import AccountBalanceBucket  # noqa
+from app.models.balance_snapshot import BalanceSnapshot  # noqa
+from app.models.fx_rate import FxRate  # noqa
+from app.models.idempotency_record import IdempotencyRecord  # noqa
+from app.models.outbox_event import OutboxEvent  # noqa
 from app.models.transaction import Transaction  # noqa
+from app.models.transaction_key import TransactionKey  # noqa
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -0,0 +1,40 @@
+"""02 Transactions history index
+
+Revision ID: 61fc83fa6288
+Revises: 3017f7f818eb
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '61fc83fa6288'
+down_revision: Union[str, Sequence[str], None] = '3017f7f818eb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Built concurrently so the ledger stays writable during the migration
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_transactions_account_id_created_at_id',
+            'transactions',
+            ['account_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_transactions_account_id_created_at_id',
+            table_name='transactions',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,37 @@
+"""09 FX rates
+
+Revision ID: 82eebdf5574d
+Revises: d928930bad54
+Create Date: 2026-10-18 19:05:31.402611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '82eebdf5574d'
+down_revision: Union[str, Sequence[str], None] = 'd928930bad54'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('fx_rates',
+    sa.Column('currency', sa.String(length=3), nullable=False),
+    sa.Column('rate', sa.Numeric(precision=18, scale=8), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.CheckConstraint('rate > 0', name='ck_fx_rates_rate_positive'),
+    sa.PrimaryKeyConstraint('currency')
+    )
+    # Nullable without a default: a catalog-only change on every partition
+    op.add_column('transactions', sa.Column('fx_rate', sa.Numeric(precision=18, scale=8), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('transactions', 'fx_rate')
+    op.drop_table('fx_rates')
@@ -0,0 +1,38 @@
+"""03 Balance snapshots
+
+Revision ID: 831dd3b9dd8f
+Revises: 61fc83fa6288
+Create Date: 2026-10-18 11:04:09.552731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '831dd3b9dd8f'
+down_revision: Union[str, Sequence[str], None] = '61fc83fa6288'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('balance_snapshots',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('account_id', sa.UUID(), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=18, scale=4), nullable=False),
+    sa.Column('taken_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_balance_snapshots_account_id_taken_at', 'balance_snapshots', ['account_id', 'taken_at'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_balance_snapshots_account_id_taken_at', table_name='balance_snapshots')
+    op.drop_table('balance_snapshots')
@@ -0,0 +1,45 @@
+"""04 Hot account buckets
+
+Revision ID: 89aeec0a86ef
+Revises: 831dd3b9dd8f
+Create Date: 2026-10-18 12:21:47.190315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '89aeec0a86ef'
+down_revision: Union[str, Sequence[str], None] = '831dd3b9dd8f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing accounts stay regular; hot mode is enabled per account with
+    # `python -m app.jobs.hot_accounts enable`
+    op.add_column('accounts', sa.Column('balance_buckets', sa.SmallInteger(), server_default='0', nullable=False))
+    op.create_table('account_balance_buckets',
+    sa.Column('account_id', sa.UUID(), nullable=False),
+    sa.Column('bucket', sa.SmallInteger(), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=18, scale=4), nullable=False),
+    sa.ForeignKeyConstraint(['account_id'], ['accounts.id'], ),
+    sa.PrimaryKeyConstraint('account_id', 'bucket')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Fold bucket balances back into the account row before dropping them
+    op.execute(
+        "UPDATE accounts SET balance = accounts.balance + b.total "
+        "FROM (SELECT account_id, sum(balance) AS total "
+        "FROM account_balance_buckets GROUP BY account_id) b "
+        "WHERE accounts.id = b.account_id"
+    )
+    op.drop_table('account_balance_buckets')
+    op.drop_column('accounts', 'balance_buckets')
@@ -0,0 +1,51 @@
+"""07 Transactions covering index
+
+Revision ID: bce922783e17
+Revises: 6ae1a37e5482
+Create Date: 2026-10-18 16:02:37.514226
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bce922783e17'
+down_revision: Union[str, Sequence[str], None] = '6ae1a37e5482'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _replace_history_index(include) -> None:
+    # Build the new index next to the old one, then swap names, so history
+    # pagination keeps an index and the ledger stays writable throughout
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_transactions_account_id_created_at_id_new',
+            'transactions',
+            ['account_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_include=include,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_transactions_account_id_created_at_id',
+            table_name='transactions',
+            postgresql_concurrently=True,
+        )
+        op.execute(
+            'ALTER INDEX ix_transactions_account_id_created_at_id_new '
+            'RENAME TO ix_transactions_account_id_created_at_id'
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # type and amount in the index let activity aggregation skip the heap
+    _replace_history_index(['type', 'amount'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _replace_history_index([])
@@ -0,0 +1,235 @@
+"""08 Partitioned transactions
+
+Revision ID: d928930bad54
+Revises: bce922783e17
+Create Date: 2026-10-18 17:20:48.905117
+
+"""
+import time
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd928930bad54'
+down_revision: Union[str, Sequence[str], None] = 'bce922783e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Future months partitioned up front; the service and the maintenance job
+# keep extending this
+PARTITIONS_AHEAD = 3
+BACKFILL_BATCH_SIZE = 10000
+# The swap waits at most 10s for its lock per attempt
+SWAP_ATTEMPTS = 5
+
+COLUMNS = 'id, idempotency_key, account_id, amount, type, created_at'
+
+CLAIM_KEY_FUNCTION = """
+    CREATE OR REPLACE FUNCTION transactions_claim_idempotency_key() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO transaction_keys (idempotency_key, created_at)
+        VALUES (NEW.idempotency_key, NEW.created_at);
+        RETURN NEW;
+    END
+    $$
+"""
+
+MIRROR_FUNCTION = f"""
+    CREATE OR REPLACE FUNCTION transactions_mirror() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        INSERT INTO transactions_partitioned ({COLUMNS})
+        VALUES (NEW.id, NEW.idempotency_key, NEW.account_id, NEW.amount,
+                NEW.type, NEW.created_at);
+        RETURN NULL;
+    END
+    $$
+"""
+
+# Rows already mirrored by the trigger or copied by an earlier run have their
+# key claimed; the key and the row become visible together, so the check
+# can't race the trigger and a restarted backfill copies nothing twice
+BACKFILL_BATCH = sa.text(f"""
+    WITH batch AS (
+        SELECT {COLUMNS} FROM transactions
+        WHERE id > :after
+        ORDER BY id
+        LIMIT :batch_size
+    ),
+    copied AS (
+        INSERT INTO transactions_partitioned ({COLUMNS})
+        SELECT {COLUMNS} FROM batch
+        WHERE NOT EXISTS (
+            SELECT FROM transaction_keys AS k
+            WHERE k.idempotency_key = batch.idempotency_key
+        )
+    )
+    SELECT id FROM batch ORDER BY id DESC LIMIT 1
+""")
+
+
+def _month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every step before the swap is idempotent: if the swap gives up, the
+    # shadow table, triggers and backfilled rows stay and a re-run resumes
+    bind = op.get_bind()
+
+    op.create_table('transaction_keys',
+    sa.Column('idempotency_key', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('idempotency_key'),
+    if_not_exists=True
+    )
+    op.create_index(op.f('ix_transaction_keys_created_at'), 'transaction_keys', ['created_at'], unique=False, if_not_exists=True)
+
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS transactions_partitioned (
+            id UUID NOT NULL,
+            idempotency_key VARCHAR NOT NULL,
+            account_id UUID NOT NULL,
+            amount NUMERIC(18, 4) NOT NULL,
+            type VARCHAR NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            CONSTRAINT transactions_partitioned_pkey PRIMARY KEY (id, created_at),
+            CONSTRAINT transactions_partitioned_account_id_fkey
+                FOREIGN KEY (account_id) REFERENCES accounts (id)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_transactions_partitioned_history
+        ON transactions_partitioned (account_id, created_at, id)
+        INCLUDE (type, amount)
+    """)
+
+    now = datetime.now(timezone.utc)
+    oldest = bind.scalar(sa.text('SELECT min(created_at) FROM transactions'))
+    month = _month_start(oldest or now)
+    last = _add_months(_month_start(now), PARTITIONS_AHEAD)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS transactions_y{month.year:04d}m{month.month:02d} "
+            "PARTITION OF transactions_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()}') "
+            f"TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+    op.execute(CLAIM_KEY_FUNCTION)
+    op.execute("""
+        CREATE OR REPLACE TRIGGER transactions_claim_idempotency_key
+        BEFORE INSERT ON transactions_partitioned
+        FOR EACH ROW EXECUTE FUNCTION transactions_claim_idempotency_key()
+    """)
+    op.execute(MIRROR_FUNCTION)
+
+    # Everything above is committed before the ledger is touched. Creating
+    # the trigger waits for inserts in flight, so every later row is
+    # mirrored and every earlier one is visible to the backfill
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        bind.execute(sa.text("""
+            CREATE OR REPLACE TRIGGER transactions_mirror
+            AFTER INSERT ON transactions
+            FOR EACH ROW EXECUTE FUNCTION transactions_mirror()
+        """))
+        after = '00000000-0000-0000-0000-000000000000'
+        while True:
+            last_id = bind.scalar(
+                BACKFILL_BATCH, {'after': after, 'batch_size': BACKFILL_BATCH_SIZE}
+            )
+            if last_id is None:
+                break
+            after = str(last_id)
+
+    # Short exclusive lock for the swap only; give up rather than queue
+    # behind long transactions, and try again a few times before failing
+    bind = op.get_bind()
+    for attempt in range(1, SWAP_ATTEMPTS + 1):
+        try:
+            with bind.begin_nested():
+                bind.execute(sa.text("SET LOCAL lock_timeout = '10s'"))
+                bind.execute(
+                    sa.text('LOCK TABLE transactions IN ACCESS EXCLUSIVE MODE')
+                )
+            break
+        except sa.exc.OperationalError as exc:
+            # 55P03: lock_not_available
+            lock_timeout = getattr(exc.orig, 'pgcode', None) == '55P03'
+            if not lock_timeout or attempt == SWAP_ATTEMPTS:
+                raise
+            time.sleep(attempt)
+    op.execute('DROP TABLE transactions')
+    op.execute('DROP FUNCTION transactions_mirror()')
+    op.execute('ALTER TABLE transactions_partitioned RENAME TO transactions')
+    op.execute(
+        'ALTER TABLE transactions RENAME CONSTRAINT '
+        'transactions_partitioned_pkey TO transactions_pkey'
+    )
+    op.execute(
+        'ALTER TABLE transactions RENAME CONSTRAINT '
+        'transactions_partitioned_account_id_fkey TO transactions_account_id_fkey'
+    )
+    op.execute(
+        'ALTER INDEX ix_transactions_partitioned_history '
+        'RENAME TO ix_transactions_account_id_created_at_id'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Offline: copies the attached partitions back into one table. Archived
+    # partitions are not restored
+    op.execute('LOCK TABLE transactions IN ACCESS EXCLUSIVE MODE')
+    op.execute("""
+        CREATE TABLE transactions_plain (
+            id UUID NOT NULL,
+            idempotency_key VARCHAR NOT NULL,
+            account_id UUID NOT NULL,
+            amount NUMERIC(18, 4) NOT NULL,
+            type VARCHAR NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            CONSTRAINT transactions_plain_pkey PRIMARY KEY (id),
+            CONSTRAINT transactions_plain_account_id_fkey
+                FOREIGN KEY (account_id) REFERENCES accounts (id)
+        )
+    """)
+    op.execute(
+        f'INSERT INTO transactions_plain ({COLUMNS}) '
+        f'SELECT {COLUMNS} FROM transactions'
+    )
+    op.execute('DROP TABLE transactions')
+    op.execute('DROP FUNCTION transactions_claim_idempotency_key()')
+    op.execute('ALTER TABLE transactions_plain RENAME TO transactions')
+    op.execute(
+        'ALTER TABLE transactions RENAME CONSTRAINT '
+        'transactions_plain_pkey TO transactions_pkey'
+    )
+    op.execute(
+        'ALTER TABLE transactions RENAME CONSTRAINT '
+        'transactions_plain_account_id_fkey TO transactions_account_id_fkey'
+    )
+    op.create_index(op.f('ix_transactions_idempotency_key'), 'transactions', ['idempotency_key'], unique=True)
+    op.create_index(
+        'ix_transactions_account_id_created_at_id',
+        'transactions',
+        ['account_id', 'created_at', 'id'],
+        unique=False,
+        postgresql_include=['type', 'amount'],
+    )
+    op.drop_index(op.f('ix_transaction_keys_created_at'), table_name='transaction_keys')
+    op.drop_table('transaction_keys')